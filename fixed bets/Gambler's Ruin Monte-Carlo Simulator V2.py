@@ -1,6 +1,11 @@
 import random
-import matplotlib.pyplot as plt
 import math
+import os
+import sys
+
+# make the shared engine at the repo root importable when running this script directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from kelly_engine import run_fixed_bet_simulations, exact_gamblers_ruin, print_exact_summary
 
 def run_single_simulation(starting_wealth, up_amount, p_up, down_amount, p_down, upper_bet_limit, lower_threshold):
 
@@ -119,6 +124,7 @@ def run_multiple_simulations(num_simulations, starting_wealth, up_amount, p_up,
 
 def plot_sample_histories(all_wealth_histories, num_samples=10):
 
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6))
     for i, history in enumerate(all_wealth_histories[:num_samples]):
         plt.plot(history, label=f"Simulation {i+1}")
@@ -131,6 +137,7 @@ def plot_sample_histories(all_wealth_histories, num_samples=10):
 
 def plot_final_wealth_histogram(final_wealths):
 
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6))
     plt.hist(final_wealths, bins=50, edgecolor='black', alpha=0.7)
     plt.xlabel("Final Wealth")
@@ -139,6 +146,17 @@ def plot_final_wealth_histogram(final_wealths):
     plt.grid(True)
     plt.show()
 
+def plot_exact_final_wealth_distribution(wealth_levels, probabilities):
+
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(12, 6))
+    plt.bar(wealth_levels, probabilities, width=(wealth_levels[1] - wealth_levels[0]) if len(wealth_levels) > 1 else 1)
+    plt.xlabel("Final Wealth")
+    plt.ylabel("Probability")
+    plt.title("Exact Final Wealth Distribution")
+    plt.grid(True)
+    plt.show()
+
 def simulate_gamblers_ruin_advanced():
 
     print("=== Advanced Gambler's Ruin Simulation ===\n")
@@ -155,6 +173,7 @@ def simulate_gamblers_ruin_advanced():
     upper_bet_limit = 1000    # max number of bets
     lower_threshold = 500           # bankruptcy threshold
     num_simulations = 1000        # number of simulations to run
+    mode = "vectorized"           # "loop" (one bet at a time), "vectorized" (integer lattice engine) or "exact"
     
 
     # calculate up_amount and down_amount based on wager and percentage returns
@@ -177,14 +196,25 @@ def simulate_gamblers_ruin_advanced():
     print(f"Lower Threshold: {lower_threshold}")
     print(f"Number of Simulations: {num_simulations}\n")
     
-    final_wealths, peak_wealths, min_wealths, all_wealth_histories, ruin_count, smallest_min_wealth, highest_peak_wealth = run_multiple_simulations(
-        num_simulations, starting_wealth, up_amount, p_up, down_amount, p_down, upper_bet_limit, lower_threshold
-    )
-    
-    plot_sample_histories(all_wealth_histories, num_samples=100)
-    
-    # plot histogram of final wealths
-    plot_final_wealth_histogram(final_wealths)
+    if mode == "exact":
+        # exact distributions from the banded transition matrix over wealth levels (no sampling)
+        exact = exact_gamblers_ruin(starting_wealth, up_amount, p_up, down_amount, p_down, upper_bet_limit, lower_threshold)
+        print_exact_summary(exact)
+        plot_exact_final_wealth_distribution(exact['wealth_levels'], exact['final_wealth_probabilities'])
+    else:
+        if mode == "vectorized":
+            final_wealths, peak_wealths, min_wealths, all_wealth_histories, ruin_count, smallest_min_wealth, highest_peak_wealth = run_fixed_bet_simulations(
+                num_simulations, starting_wealth, up_amount, p_up, down_amount, p_down, upper_bet_limit, lower_threshold, keep_histories=100
+            )
+        else:
+            final_wealths, peak_wealths, min_wealths, all_wealth_histories, ruin_count, smallest_min_wealth, highest_peak_wealth = run_multiple_simulations(
+                num_simulations, starting_wealth, up_amount, p_up, down_amount, p_down, upper_bet_limit, lower_threshold
+            )
+
+        plot_sample_histories(all_wealth_histories, num_samples=100)
+
+        # plot histogram of final wealths
+        plot_final_wealth_histogram(final_wealths)
     
     print("=== Additional Insights ===")
     #print(f"Maximum Wealth Achieved Across All Simulations: {highest_peak_wealth}")
@@ -0,0 +1,21 @@
+from .optimal import compute_optimal_fraction, compute_scaled_fraction, clear_fraction_cache
+from .optimal import prelec_weight, break_even_alpha
+from .fun_utility import solve_fun_utility_fraction
+from .engine import simulate_paths, run_multiple_simulations, results_dataframe, print_summary, summary_statistics
+from .policy import wealth_grid, fun_utility_policy_table, interpolated_policy, dynamic_policy
+from .policy import drawdown_throttled_policy, time_decay_policy, loss_streak_policy
+from .dynamic import solve_dynamic_policy
+from .fixed import simulate_fixed_paths, exact_gamblers_ruin, run_fixed_bet_simulations, print_exact_summary
+from .stream import simulate_stream_paths
+from .jit import simulate_paths_jit
+from .parallel import simulate_paths_parallel, merge_results, benchmark_backends
+from .analytic import growth_surface, growth_check
+from .diffusion import diffusion_kelly, diffusion_fixed, print_diffusion_summary
+from .frontier import kelly_frontier, print_frontier
+from .optimize import optimize_fraction
+from .drawdown import exact_drawdown, sample_drawdown, print_drawdown_summary
+from .risk import exact_final_wealth, risk_profile, print_risk_profile
+from .batch import load_manifest, run_job, run_manifest
+from .checkpoint import simulate_paths_checkpointed
+from .incremental import iter_simulations
+from .timing import phase_timer, untimed, print_timings
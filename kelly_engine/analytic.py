@@ -0,0 +1,135 @@
+import math
+
+import numpy as np
+
+from .optimal import compute_scaled_fraction, prelec_weight
+
+
+def growth_surface(p_actual, b, g=1.0, scale=1.0, alpha=1.0, p_perceived=None, p_down=None, num_bets=None,
+                   starting_wealth=1.0):
+    """
+    Closed-form log growth of a constant-fraction bettor over whole parameter grids in one call.
+
+    The fraction is sized on the perceived probability (p_perceived, or p_actual if not
+    given, passed through Prelec weighting with alpha) exactly as the scripts do:
+    compute_scaled_fraction(p_perceived, b, g, scale), clamped to [0, 1]. Outcomes use
+    the actual probabilities, so per bet log-wealth moves by ln(1 + f b) with
+    probability p_actual, ln(1 - f) with probability p_down, and 0 otherwise. All
+    arguments broadcast against each other.
+
+    These are the figures for an unstopped bettor: a path that hits the ruin threshold
+    stops betting, so with frequent ruin the simulated averages will sit off them.
+
+    Parameters:
+    - p_actual (array_like): Actual probability of winning.
+    - b (array_like): Net odds (b to 1).
+    - g, scale, alpha (array_like): Risk aversion, Kelly scale and Prelec alpha.
+    - p_perceived (array_like): Perceived probability before weighting (default p_actual).
+    - p_down (array_like): Actual probability of losing (default 1 - p_actual).
+    - num_bets (array_like): If given, also return the median wealth after that many bets.
+    - starting_wealth (float): Starting wealth for median_wealth.
+
+    Returns:
+    - surface (dict of ndarray): 'p_perceived' (after weighting), 'f_scaled',
+      'log_growth' (expected log growth per bet), 'log_growth_var' and 'log_growth_std'
+      (its variance and standard deviation per bet), 'median_growth' (exp(log_growth),
+      the asymptotic per-bet growth of median wealth) and, with num_bets,
+      'median_wealth' ≈ starting_wealth * exp(num_bets * log_growth).
+    """
+    p_actual, b = np.asarray(p_actual, dtype=float), np.asarray(b, dtype=float)
+    p_down = 1 - p_actual if p_down is None else np.asarray(p_down, dtype=float)
+    p_perceived = prelec_weight(p_actual if p_perceived is None else p_perceived, alpha)
+    f = np.asarray(compute_scaled_fraction(p_perceived, b, g, scale))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        up, down = np.log1p(f * b), np.log1p(-f)
+        # no bet means no move, even at f = 1 where ln(1 - f) is -inf
+        up, down = np.where(f == 0, 0.0, up), np.where(f == 0, 0.0, down)
+        log_growth = p_actual * up + p_down * down
+        log_growth_var = p_actual * up**2 + p_down * down**2 - log_growth**2
+    log_growth_var = np.maximum(log_growth_var, 0.0)
+
+    surface = {
+        'p_perceived': np.asarray(p_perceived),
+        'f_scaled': f,
+        'log_growth': log_growth,
+        'log_growth_var': log_growth_var,
+        'log_growth_std': np.sqrt(log_growth_var),
+        'median_growth': np.exp(log_growth),
+    }
+    if num_bets is not None:
+        surface['median_wealth'] = starting_wealth * np.exp(np.asarray(num_bets, dtype=float) * log_growth)
+    shape = np.broadcast_shapes(*(value.shape for value in surface.values()))
+    return {key: np.broadcast_to(value, shape) for key, value in surface.items()}
+
+
+def growth_check(slope_log_wealth, log_growth, z_limit=4.0, log_wealth_change=None, bet_count=None):
+    """
+    Compares the simulated per-path slopes of log-wealth with the theoretical log growth.
+
+    The closed form is for an unstopped bettor, and a path stopped at the ruin threshold
+    has a slope well off it (survivors are biased the other way), so once ruin stops any
+    path early the slopes can't be checked. Given each path's log_wealth_change
+    ln(W_T / W0) and bet_count T, the check then uses Wald's identity instead:
+    E[ln(W_T / W0)] = log_growth * E[T] however the paths were stopped, so the pooled
+    growth per bet, sum ln(W_T / W0) / sum T, is compared with theory.
+
+    Parameters:
+    - slope_log_wealth (array_like): Per-path slopes (the Slope_Log_Wealth column).
+    - log_growth (float): growth_surface(...)['log_growth'] for the same parameters.
+    - z_limit (float): Flag the run when the estimate is more than this many standard
+      errors from theory.
+    - log_wealth_change, bet_count (array_like): Per-path ln(final / starting wealth) and
+      bets placed, for runs where ruin stops paths early.
+
+    Returns:
+    - check (dict): 'theory', 'simulated' (mean slope), 'stopped' (whether the Wald form
+      was used), 'estimate' (the mean slope, or the pooled growth per bet when stopped),
+      'se' (its standard error), 'z', and 'consistent' (False flags the run).
+    """
+    slopes = np.asarray(slope_log_wealth, dtype=float)
+    simulated = float(slopes.mean())
+    theory = float(log_growth)
+    n = len(slopes)
+    stopped = bet_count is not None and np.ptp(bet_count) > 0
+    if stopped:
+        # ln(W_T / W0) - T log_growth has mean zero; its ratio to the mean T is the pooled
+        # growth per bet minus theory, with the delta-method standard error
+        counts = np.asarray(bet_count, dtype=float)
+        residual = np.asarray(log_wealth_change, dtype=float) - theory * counts
+        estimate = theory + float(residual.mean() / counts.mean())
+        se = float(residual.std(ddof=1) / math.sqrt(n) / counts.mean())
+    else:
+        estimate = simulated
+        se = float(slopes.std(ddof=1) / math.sqrt(n)) if n > 1 else math.nan
+    if se > 0:
+        z = (estimate - theory) / se
+    else:
+        z = 0.0 if math.isclose(estimate, theory, rel_tol=1e-9, abs_tol=1e-12) else math.inf
+    return {'theory': theory, 'simulated': simulated, 'stopped': stopped, 'estimate': estimate, 'se': se, 'z': z,
+            'consistent': abs(z) <= z_limit}
+
+
+def print_growth_preview(surface):
+
+    print("=== Theoretical Growth (constant fraction, no ruin threshold) ===")
+    print(f"Expected Log Growth per Bet: {float(surface['log_growth']):.10f}")
+    print(f"Std. Dev. of Log Growth per Bet: {float(surface['log_growth_std']):.6f}")
+    if 'median_wealth' in surface:
+        print(f"Median Wealth at the Bet Limit: {float(surface['median_wealth']):.2f}")
+    print()
+
+
+def print_growth_check(check):
+
+    if check['stopped']:
+        # ruin stopped some paths, which moves their slopes off theory: the growth per bet placed doesn't move
+        print(f"Theoretical Log Growth per Bet: {check['theory']:.10f} "
+              f"(realized over the bets placed {check['estimate']:.10f} ± {check['se']:.10f}, z = {check['z']:.2f}; "
+              f"average slope {check['simulated']:.10f})")
+    else:
+        print(f"Theoretical Slope of Log-Wealth: {check['theory']:.10f} "
+              f"(simulated {check['simulated']:.10f} ± {check['se']:.10f}, z = {check['z']:.2f})")
+    if not check['consistent']:
+        print("Warning: the simulated log growth disagrees with theory.")
+    print()
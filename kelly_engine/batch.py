@@ -0,0 +1,170 @@
+import argparse
+import json
+import math
+import os
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from .engine import simulate_paths, summary_statistics, results_dataframe
+from .analytic import growth_surface, growth_check
+from .optimal import compute_optimal_fraction, prelec_weight
+from .policy import drawdown_throttled_policy, time_decay_policy
+
+# parameters of a job, with the misperceived-odds script's defaults
+JOB_DEFAULTS = {
+    'starting_wealth': 1000,
+    'p_up_actual': 1 / 34,
+    'p_down_actual': None,          # 1 - p_up_actual
+    'alpha': 1.0,                   # Prelec weighting of the perceived win probability
+    'b': 35.0,                      # net odds (b to 1)
+    'g': 0.93,                      # relative risk aversion (1 for Kelly)
+    'scale': 1.0,                   # 1 for full Kelly, 0.5 for half-Kelly
+    'upper_bet_limit': 10000,
+    'lower_threshold': 10,
+    'num_simulations': 1000,
+    'seed': None,
+    'strategy': 'constant',         # "constant", "drawdown" or "time_decay"
+    'max_drawdown': 0.5,
+    'per_path_csv': False,          # also write the per-simulation DataFrame as CSV
+    'max_bytes': 2e9,
+}
+
+
+def load_manifest(path):
+    """
+    Reads a TOML or JSON manifest into a list of fully specified jobs.
+
+    The manifest has an optional [defaults] table and a [[jobs]] array; every job is
+    JOB_DEFAULTS, updated by the manifest's defaults, updated by the job itself. Jobs
+    without a name are called job-001, job-002, ...
+    """
+    with open(path, 'rb') as file:
+        manifest = tomllib.load(file) if path.endswith('.toml') else json.load(file)
+
+    def check(table, where):
+        unknown = set(table) - set(JOB_DEFAULTS) - {'name'}
+        if unknown:
+            raise ValueError(f"Unknown parameter(s) in {where}: {sorted(unknown)}")
+
+    check(manifest.get('defaults', {}), '[defaults]')
+    defaults = {**JOB_DEFAULTS, **manifest.get('defaults', {})}
+    jobs = []
+    for i, job in enumerate(manifest.get('jobs', []), start=1):
+        check(job, f"job {i}")
+        jobs.append({'name': f"job-{i:03d}", **defaults, **job})
+    return jobs
+
+
+def _theory(p_up, p_down, job, results):
+    # closed-form growth next to the simulated figures; only a constant fraction has one
+    if job['strategy'] != 'constant':
+        return {}
+    surface = growth_surface(p_up, job['b'], job['g'], job['scale'], job['alpha'], p_down=p_down,
+                             num_bets=job['upper_bet_limit'], starting_wealth=job['starting_wealth'])
+    check = growth_check(results['slope_log_wealth'], surface['log_growth'],
+                         log_wealth_change=np.log(results['final_wealth'] / job['starting_wealth']),
+                         bet_count=results['bet_count'])
+    return {
+        'theory_log_growth': check['theory'],
+        'theory_log_growth_std': float(surface['log_growth_std']),
+        'theory_median_wealth': float(surface['median_wealth']),
+        'slope_log_wealth_z': check['z'],
+        'slope_consistent_with_theory': check['consistent'],
+    }
+
+
+def run_job(job):
+    """
+    Runs one manifest job; returns its summary (a JSON-ready dict) and the per-path
+    DataFrame, or None unless per_path_csv is set.
+
+    The bet fraction is the generalized Kelly fraction at the perceived probability
+    exp(-(-ln p_up_actual)**alpha), times scale and clamped to [0, 1], as in the
+    misperceived-odds script; outcomes use the actual probabilities.
+    """
+    start = time.perf_counter()
+    p_up = job['p_up_actual']
+    p_down = 1 - p_up if job['p_down_actual'] is None else job['p_down_actual']
+    p_perceived = prelec_weight(p_up, job['alpha'])
+    f_star = float(compute_optimal_fraction(p_perceived, job['b'], job['g']))
+    f_scaled = min(max(f_star * job['scale'], 0.0), 1.0)
+
+    if job['strategy'] == 'drawdown':
+        policy = drawdown_throttled_policy(f_scaled, job['max_drawdown'])
+    elif job['strategy'] == 'time_decay':
+        policy = time_decay_policy(f_scaled, job['upper_bet_limit'])
+    elif job['strategy'] == 'constant':
+        policy = None
+    else:
+        raise ValueError(f"Unknown strategy {job['strategy']!r} in job {job['name']}.")
+
+    results = simulate_paths(
+        job['num_simulations'], job['starting_wealth'], p_up, p_down, job['upper_bet_limit'],
+        job['lower_threshold'], job['b'], f_scaled=f_scaled, policy=policy, seed=job['seed'],
+        max_bytes=job['max_bytes'],
+    )
+    summary = {
+        'job': job,
+        'p_up_perceived': float(p_perceived),
+        'f_star': f_star,
+        'f_scaled': f_scaled,
+        **summary_statistics(results),
+        **_theory(p_up, p_down, job, results),
+        'seconds': time.perf_counter() - start,
+    }
+    per_path = results_dataframe(results) if job['per_path_csv'] else None
+    return summary, per_path
+
+
+def _write_result(out_dir, summary, per_path):
+    name = summary['job']['name']
+    # NaN (e.g. no ruin, so no average time to ruin) is written as null
+    clean = {key: None if isinstance(value, float) and math.isnan(value) else value for key, value in summary.items()}
+    with open(os.path.join(out_dir, f"{name}.json"), 'w') as file:
+        json.dump(clean, file, indent=2)
+    if per_path is not None:
+        per_path.to_csv(os.path.join(out_dir, f"{name}.csv"), index=False)
+
+
+def run_manifest(path, out_dir, workers=None, backend='process'):
+    """
+    Runs every job of a manifest on one shared, warm pool and writes one result set per job.
+
+    The pool is created once, so each worker imports kelly_engine once and then takes
+    jobs as they free up; results are written as they complete (<name>.json, plus
+    <name>.csv for jobs with per_path_csv).
+
+    Returns:
+    - summaries (list of dict): One summary per job, in manifest order.
+    """
+    jobs = load_manifest(path)
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    pool_type = ProcessPoolExecutor if backend == 'process' else ThreadPoolExecutor
+
+    summaries = [None] * len(jobs)
+    with pool_type(max_workers=min(workers, max(len(jobs), 1))) as pool:
+        futures = {pool.submit(run_job, job): i for i, job in enumerate(jobs)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            summary, per_path = future.result()
+            summaries[futures[future]] = summary
+            _write_result(out_dir, summary, per_path)
+            print(f"[{done}/{len(jobs)}] {summary['job']['name']}: ruin {summary['ruin_probability'] * 100:.2f}%, "
+                  f"mean log-wealth {summary['mean_log_wealth']:.4f} ({summary['seconds']:.2f}s)")
+    return summaries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m kelly_engine', description="Run a manifest of simulation jobs.")
+    parser.add_argument('manifest', help="TOML or JSON manifest with [defaults] and [[jobs]]")
+    parser.add_argument('-o', '--out', default='results', help="directory for the per-job results (default: results)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="pool size (default: number of CPUs)")
+    parser.add_argument('--backend', choices=('process', 'thread'), default='process')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summaries = run_manifest(args.manifest, args.out, args.workers, args.backend)
+    print(f"\n{len(summaries)} jobs finished in {time.perf_counter() - start:.2f}s; results in {args.out}/")
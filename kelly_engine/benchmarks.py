@@ -0,0 +1,178 @@
+import argparse
+import contextlib
+import io
+import json
+import random
+import time
+import tracemalloc
+
+import numpy as np
+
+from .configs import FIXED_V2, NO_MISPERCEPTION, MISPERCEPTION, FUN_UTILITY, FUN_UTILITY_STRESS, load_script
+from .engine import simulate_paths
+from .fixed import simulate_fixed_paths, exact_gamblers_ruin
+from .fun_utility import solve_fun_utility_fraction
+from .jit import HAVE_NUMBA, simulate_paths_jit
+from .optimal import compute_scaled_fraction
+from .parallel import simulate_paths_parallel
+
+
+def _measure(run, memory=True):
+    # wall-clock time of one untraced run, then peak traced memory of a second run
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        bets = run()
+    seconds = time.perf_counter() - start
+    peak = np.nan
+    if memory:
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, bets, peak
+
+
+def _row(case, engine, paths, bet_limit, seconds, bets, peak, workers=1):
+    return {
+        'case': case, 'engine': engine, 'paths': paths, 'bet_limit': bet_limit, 'workers': workers,
+        'seconds': seconds, 'bets_placed': int(bets), 'bets_per_second': bets / seconds if seconds > 0 else np.nan,
+        'peak_mb': peak / 1e6,
+    }
+
+
+def _kelly_cases(name, config, f_scaled, paths, memory):
+    # one Kelly configuration on the script's loop and on every engine
+    script = load_script(config['script'])
+    n, w0, p_up, p_down = paths, config['starting_wealth'], config['p_up'], config['p_down']
+    L, threshold, b = config['upper_bet_limit'], config['lower_threshold'], config['b']
+
+    def loop():
+        random.seed(0)
+        histories = script.run_multiple_simulations(n, w0, p_up, p_down, L, threshold, f_scaled, b)[3]
+        return sum(len(history) - 1 for history in histories)
+
+    engines = {
+        'loop': loop,
+        'numpy': lambda: simulate_paths(n, w0, p_up, p_down, L, threshold, b, f_scaled=f_scaled, seed=0)['bet_count'].sum(),
+    }
+    if HAVE_NUMBA:
+        simulate_paths_jit(10, w0, p_up, p_down, 10, threshold, b, f_scaled=f_scaled)    # compile / load from cache
+        engines['numba'] = lambda: simulate_paths_jit(n, w0, p_up, p_down, L, threshold, b, f_scaled=f_scaled,
+                                                      seed=0)['bet_count'].sum()
+    return [_row(name, engine, n, L, *_measure(run, memory)) for engine, run in engines.items()]
+
+
+def _fixed_cases(paths, memory):
+    config = FIXED_V2
+    script = load_script(config['script'])
+    args = (config['starting_wealth'], config['up_amount'], config['p_up'], config['down_amount'], config['p_down'],
+            config['upper_bet_limit'], config['lower_threshold'])
+
+    def loop():
+        random.seed(0)
+        histories = script.run_multiple_simulations(paths, *args)[3]
+        return sum(len(history) - 1 for history in histories)
+
+    engines = {
+        'loop': loop,
+        'lattice': lambda: simulate_fixed_paths(paths, *args, seed=0)['bet_count'].sum(),
+    }
+    rows = [_row('fixed V2', engine, paths, config['upper_bet_limit'], *_measure(run, memory))
+            for engine, run in engines.items()]
+    # exact mode has no paths: report its time and memory only
+    seconds, _, peak = _measure(lambda: exact_gamblers_ruin(*args), memory)
+    rows.append(_row('fixed V2', 'exact', 0, config['upper_bet_limit'], seconds, 0, peak))
+    return rows
+
+
+def _fun_utility_cases(grid_size, memory):
+    rows = []
+    for case, config in (('fun utility', FUN_UTILITY), ('fun utility (stress)', FUN_UTILITY_STRESS)):
+        p, b, g, c, alpha = (config[key] for key in ('p', 'b', 'g', 'c', 'alpha'))
+        # the script's wealth range for its f*(W) table, on a much finer grid
+        w0 = config['starting_wealth']
+        wealth = np.geomspace(max(config['lower_threshold'], w0 * 1e-6), w0 * 1e6, grid_size)
+        seconds, _, peak = _measure(lambda: solve_fun_utility_fraction(p, b, g, c, alpha, wealth), memory)
+        rows.append({'case': case, 'engine': 'newton', 'points': grid_size, 'seconds': seconds,
+                     'points_per_second': grid_size / seconds, 'peak_mb': peak / 1e6})
+    return rows
+
+
+def _scaling_cases(paths, memory):
+    # paths, bets and workers doubled in turn on the no-misperception gamma = 1 run
+    config = NO_MISPERCEPTION
+    f_scaled = float(compute_scaled_fraction(config['p_up'], config['b'], 1.0))
+    w0, p_up, p_down, threshold, b = (config[key] for key in ('starting_wealth', 'p_up', 'p_down', 'lower_threshold', 'b'))
+    rows = []
+    for factor in (1, 2, 4):
+        n, L = paths * factor, config['upper_bet_limit']
+        run = lambda: simulate_paths(n, w0, p_up, p_down, L, threshold, b, f_scaled=f_scaled, seed=0)['bet_count'].sum()
+        rows.append(_row('scaling: paths', 'numpy', n, L, *_measure(run, memory)))
+    for factor in (1, 2, 4):
+        n, L = paths, config['upper_bet_limit'] * factor
+        run = lambda: simulate_paths(n, w0, p_up, p_down, L, threshold, b, f_scaled=f_scaled, seed=0)['bet_count'].sum()
+        rows.append(_row('scaling: bets', 'numpy', n, L, *_measure(run, memory)))
+    for backend in ('thread', 'process'):
+        for workers in (1, 2, 4):
+            n, L = paths * 4, config['upper_bet_limit']
+            run = lambda: simulate_paths_parallel(n, w0, p_up, p_down, L, threshold, b, f_scaled=f_scaled, seed=0,
+                                                  workers=workers, backend=backend)['bet_count'].sum()
+            rows.append(_row('scaling: workers', backend, n, L, *_measure(run, memory and backend == 'thread'), workers))
+    return rows
+
+
+def run_benchmarks(quick=False, memory=True):
+    """
+    Times every engine on the shipped script configurations, plus scaling runs.
+
+    Cases: the fixed-bet V2 run (script loop, lattice engine, exact mode), the
+    no-misperception run at g = 0.5, 1 and 2, the p = 1/34, b = 35, 10000-bet
+    misperception run (script loop, NumPy engine, numba kernel if installed), the
+    fun-utility Newton solver on With Fun Utility.py's parameters and on a synthetic
+    stress case with the fun term on (FUN_UTILITY_STRESS), and the NumPy engine with paths, bets and thread /
+    process workers doubled in turn. quick=True runs a tenth of the paths.
+
+    Returns:
+    - rows (list of dict): One row per case and engine with 'seconds', 'bets_per_second'
+      (bets actually placed, so early ruin counts for less) and 'peak_mb' (tracemalloc
+      peak of a second, traced run; process workers are not traced).
+    """
+    scale = 10 if quick else 1
+    rows = _fixed_cases(FIXED_V2['num_simulations'] // scale, memory)
+    for g in (0.5, 1.0, 2.0):
+        config = NO_MISPERCEPTION
+        f_scaled = float(compute_scaled_fraction(config['p_up'], config['b'], g))
+        rows += _kelly_cases(f"no misperception g={g}", config, f_scaled, config['num_simulations'] // scale, memory)
+    config = MISPERCEPTION
+    f_scaled = float(compute_scaled_fraction(config['p_up'], config['b'], config['g']))
+    rows += _kelly_cases("misperception p=1/34 b=35", config, f_scaled, config['num_simulations'] // scale, memory)
+    rows += _fun_utility_cases(100000 // scale, memory)
+    rows += _scaling_cases(NO_MISPERCEPTION['num_simulations'] * 4 // scale, memory)
+    return rows
+
+
+def print_benchmarks(rows):
+
+    print(f"{'case':<28}{'engine':<9}{'paths':>8}{'bets':>7}{'workers':>8}{'seconds':>9}{'bets/s':>13}{'peak MB':>9}")
+    for row in rows:
+        if 'points' in row:
+            print(f"{row['case']:<28}{row['engine']:<9}{row['points']:>8}{'':>7}{'':>8}{row['seconds']:>9.3f}"
+                  f"{row['points_per_second']:>13.3g}{row['peak_mb']:>9.1f}  (points solved)")
+        else:
+            print(f"{row['case']:<28}{row['engine']:<9}{row['paths']:>8}{row['bet_limit']:>7}{row['workers']:>8}"
+                  f"{row['seconds']:>9.3f}{row['bets_per_second']:>13.3g}{row['peak_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='python -m kelly_engine.benchmarks', description="Benchmark every engine.")
+    parser.add_argument('--quick', action='store_true', help="a tenth of the paths")
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced second run")
+    parser.add_argument('--json', help="also write the rows to this file, to compare runs")
+    args = parser.parse_args()
+
+    rows = run_benchmarks(quick=args.quick, memory=not args.no_memory)
+    print_benchmarks(rows)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(rows, file, indent=2, default=float)
@@ -0,0 +1,92 @@
+import json
+import os
+
+import numpy as np
+
+from .engine import simulate_paths
+from .parallel import merge_results
+
+_RESULT_KEYS = ('final_wealth', 'peak_wealth', 'min_wealth', 'went_bankrupt', 'bet_count',
+                'mean_log_wealth', 'std_log_wealth', 'slope_log_wealth')
+
+
+def _save_shard(path, results):
+    # histories are stored flat with their lengths; written to a temporary file and renamed,
+    # so a crash mid-write never leaves a shard that looks complete
+    lengths = np.array([len(history) for history in results['histories']], dtype=np.int64)
+    flat = np.concatenate(results['histories']) if len(lengths) else np.empty(0)
+    tmp = path + '.tmp.npz'
+    np.savez(tmp, history_lengths=lengths, histories=flat, **{key: results[key] for key in _RESULT_KEYS})
+    os.replace(tmp, path)
+
+
+def _load_shard(path):
+    with np.load(path) as shard:
+        results = {key: shard[key] for key in _RESULT_KEYS}
+        lengths = shard['history_lengths']
+        results['histories'] = np.split(shard['histories'], np.cumsum(lengths)[:-1]) if len(lengths) else []
+    return results
+
+
+def simulate_paths_checkpointed(checkpoint_dir, num_simulations, starting_wealth, p_up, p_down, upper_bet_limit,
+                                lower_threshold, b, f_scaled=None, policy=None, seed=None, keep_histories=0,
+                                outcome_memory=0, max_bytes=2e9, shard_size=100000):
+    """
+    simulate_paths in shards of shard_size paths, each saved to checkpoint_dir as it finishes.
+
+    Every shard has its own Generator, spawned from one SeedSequence whose entropy is
+    stored in checkpoint_dir/run.json with the run's parameters. Calling this again with
+    the same directory skips the shards already on disk and runs the rest, so a resumed
+    run is bit-identical to one that was never interrupted; at most the shard in progress
+    is lost. A directory written with different parameters is refused, max_bytes
+    included: it sets the chunking, and so the order random numbers are drawn in. The
+    policy, if any, is not recorded and must be the same on resume.
+
+    Parameters:
+    - checkpoint_dir (str): Directory for run.json and the shard-NNNNN.npz files.
+    - Same as simulate_paths, plus:
+    - shard_size (int): Paths per shard (each shard also gets the whole max_bytes).
+
+    Returns:
+    - results (dict): Same keys as simulate_paths, over all paths.
+    """
+    params = {
+        'num_simulations': num_simulations, 'starting_wealth': starting_wealth, 'p_up': p_up, 'p_down': p_down,
+        'upper_bet_limit': upper_bet_limit, 'lower_threshold': lower_threshold, 'b': b, 'f_scaled': f_scaled,
+        'policy': policy is not None, 'keep_histories': keep_histories, 'outcome_memory': outcome_memory,
+        'max_bytes': max_bytes, 'shard_size': shard_size,
+    }
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    run_file = os.path.join(checkpoint_dir, 'run.json')
+    if os.path.exists(run_file):
+        with open(run_file) as file:
+            run = json.load(file)
+        if run['params'] != params:
+            raise ValueError(f"{checkpoint_dir} holds a run with different parameters: {run['params']}")
+        if seed is not None and run['entropy'] != np.random.SeedSequence(seed).entropy:
+            raise ValueError(f"{checkpoint_dir} holds a run with a different seed.")
+        entropy = run['entropy']
+    else:
+        entropy = np.random.SeedSequence(seed).entropy
+        with open(run_file, 'w') as file:
+            json.dump({'params': params, 'entropy': entropy}, file, indent=2)
+
+    starts = range(0, num_simulations, shard_size)
+    seeds = np.random.SeedSequence(entropy).spawn(len(starts))
+    parts = []
+    for shard, (start, shard_seed) in enumerate(zip(starts, seeds)):
+        path = os.path.join(checkpoint_dir, f"shard-{shard:05d}.npz")
+        if os.path.exists(path):
+            parts.append(_load_shard(path))
+            continue
+        stop = min(start + shard_size, num_simulations)
+        rng = np.random.default_rng(shard_seed)
+        results = simulate_paths(
+            stop - start, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b,
+            f_scaled=f_scaled, policy=policy, seed=rng,
+            keep_histories=min(max(keep_histories - start, 0), stop - start),
+            outcome_memory=outcome_memory, max_bytes=max_bytes,
+        )
+        _save_shard(path, results)
+        parts.append(results)
+    return merge_results(parts)
@@ -0,0 +1,29 @@
+import importlib.util
+import os
+
+# the scripts and their shipped parameters, shared by the benchmarks and the validation suite
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# as set in each script's simulate_gamblers_ruin_advanced()
+FIXED_V2 = dict(script="fixed bets/Gambler's Ruin Monte-Carlo Simulator V2.py", num_simulations=1000,
+                starting_wealth=1000, up_amount=22.0, p_up=0.5, down_amount=20, p_down=0.5,
+                upper_bet_limit=1000, lower_threshold=500)
+NO_MISPERCEPTION = dict(script="no misperception kelly/Monte_Carlo_Kelly_Simulator_Analysis.py", num_simulations=1000,
+                        starting_wealth=1000, p_up=0.05, p_down=0.95, upper_bet_limit=1000, lower_threshold=250, b=20.0)
+MISPERCEPTION = dict(script="misperception kelly/Monte_Carlo_Kelly_Simulator_Analysis_Misperceived_Odds.py",
+                     num_simulations=1000, starting_wealth=1000, p_up=1 / 34, p_down=33 / 34, upper_bet_limit=10000,
+                     lower_threshold=10, b=35.0, g=0.93)
+FUN_UTILITY = dict(script="misperception kelly/With Fun Utility.py", starting_wealth=1000, lower_threshold=1,
+                   p=0.1, b=1.0, g=1.0, c=0.0, alpha=0.0)
+# not a shipped configuration: a synthetic stress case with the fun term switched on (c = 1,
+# alpha = 1), so the Newton iterations actually run instead of starting at the c = 0 closed form
+FUN_UTILITY_STRESS = dict(FUN_UTILITY, c=1.0, alpha=1.0)
+
+
+def load_script(relative_path):
+    # the scripts live in folders with spaces in their names, so load them by path
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(relative_path))[0].replace(' ', '_'),
+                                                  os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,158 @@
+import math
+
+import numpy as np
+
+from .fixed import _lattice, _ruin_level
+
+# Siegmund's overshoot constant -zeta(1/2) / sqrt(2 pi): a random walk checked once per
+# bet crosses a barrier about this many step standard deviations past it
+_OVERSHOOT = 0.5826
+# Berry-Esseen constant (Shevtsova) for sums of i.i.d. bets
+_BERRY_ESSEEN = 0.4748
+
+_erfc = np.vectorize(math.erfc, otypes=[float])
+
+
+def _log_norm_cdf(x):
+    # log Phi(x), with the asymptotic series deep in the lower tail where erfc underflows
+    x = np.asarray(x, dtype=float)
+    out = np.empty_like(x)
+    tail = x < -30
+    out[~tail] = np.log(0.5 * _erfc(-x[~tail] / math.sqrt(2)))
+    t = x[tail]
+    r = 1 / t
+    with np.errstate(over='ignore'):
+        out[tail] = -t**2 / 2 - np.log(-t) - 0.5 * math.log(2 * math.pi) + np.log1p(-r**2 + 3 * r**4)
+    return out
+
+
+def _first_passage_cdf(t, distance, drift, variance):
+    # P(a Brownian motion with this drift and variance per bet falls distance below its start by time t)
+    t = np.maximum(np.asarray(t, dtype=float), 1e-300)
+    s = np.sqrt(variance * t)
+    direct = np.exp(_log_norm_cdf((-distance - drift * t) / s))
+    reflected = np.exp(-2 * drift * distance / variance + _log_norm_cdf((-distance + drift * t) / s))
+    return np.minimum(direct + reflected, 1.0)
+
+
+def _first_passage_pdf(t, distance, drift, variance):
+    # inverse Gaussian density (defective when the drift is positive)
+    t = np.maximum(np.asarray(t, dtype=float), 1e-300)
+    return distance / np.sqrt(2 * math.pi * variance * t**3) * np.exp(-(distance + drift * t) ** 2 / (2 * variance * t))
+
+
+def _diffusion(distance, steps, probabilities, upper_bet_limit, continuity_correction, tolerance):
+    # Brownian approximation of a random walk with the given per-bet steps, ruined distance below its start
+    steps, probabilities = np.asarray(steps, dtype=float), np.asarray(probabilities, dtype=float)
+    drift = float(probabilities @ steps)
+    variance = float(probabilities @ (steps - drift) ** 2)
+    third = float(probabilities @ np.abs(steps - drift) ** 3)
+    sd = math.sqrt(variance)
+    if distance <= 0 or variance == 0:
+        raise ValueError("The diffusion approximation needs a positive distance to ruin and random bets.")
+    if continuity_correction:
+        distance += _OVERSHOOT * sd
+
+    def cdf(t):
+        return _first_passage_cdf(t, distance, drift, variance)
+
+    def pdf(t):
+        return _first_passage_pdf(t, distance, drift, variance)
+
+    ruin_probability = float(cdf(upper_bet_limit))
+    # E[T; T <= n] = n F(n) - integral of F over [0, n]
+    grid = np.linspace(0.0, upper_bet_limit, 20001)
+    truncated_mean = upper_bet_limit * ruin_probability - float(np.trapezoid(cdf(grid), grid))
+    berry_esseen = _BERRY_ESSEEN * third / (sd**3 * math.sqrt(upper_bet_limit))
+    step_ratio = float(np.abs(steps).max() / distance)
+    return {
+        'drift': drift,
+        'variance': variance,
+        'distance': distance,
+        'ruin_probability': ruin_probability,
+        'ruin_probability_infinite': math.exp(-2 * drift * distance / variance) if drift > 0 else 1.0,
+        'average_time_to_ruin': truncated_mean / ruin_probability if ruin_probability > 0 else np.nan,
+        'first_passage_cdf': cdf,
+        'first_passage_pdf': pdf,
+        'berry_esseen_bound': berry_esseen,
+        'step_ratio': step_ratio,
+        'safe': berry_esseen <= tolerance and step_ratio <= 0.1,
+    }
+
+
+def diffusion_kelly(starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b,
+                    continuity_correction=True, tolerance=0.01):
+    """
+    Brownian approximation of a constant-fraction bettor: closed-form ruin and first-passage times.
+
+    Log-wealth moves by ln(1 + f b) with p_up, ln(1 - f) with p_down and 0 otherwise; it is
+    replaced by a Brownian motion with the same drift mu and variance sigma² per bet, and
+    ruin is the first passage to ln(lower_threshold). The first-passage time is inverse
+    Gaussian: its distribution is closed form for any horizon, so 10^9 bets cost the
+    same as 10. continuity_correction moves the barrier 0.5826 sigma further away
+    (Siegmund), which accounts for the walk overshooting it between checks.
+
+    Error bounds (the 'safe' flag requires both):
+    - berry_esseen_bound: 0.4748 E|X - mu|³ / (sigma³ sqrt(n)) bounds the error of the
+      normal approximation to the unstopped log-wealth distribution after n bets.
+      Long-shot bets (small p, large b) are very skewed and need many bets for it to be small.
+    - step_ratio: the largest single-bet move in log-wealth over the (corrected) distance
+      to ruin. The corrected approximation's ruin error shrinks with it; above 0.1
+      a handful of bets can cause ruin and the walk is too coarse for a diffusion.
+
+    Parameters:
+    - Same as run_single_simulation in the Kelly scripts, plus:
+    - continuity_correction (bool): Shift the barrier for discrete monitoring.
+    - tolerance (float): Largest berry_esseen_bound still flagged safe.
+
+    Returns:
+    - approximation (dict): 'ruin_probability' (within upper_bet_limit bets),
+      'ruin_probability_infinite', 'average_time_to_ruin' (given ruin within the limit),
+      'first_passage_cdf' and 'first_passage_pdf' (functions of the bet number t),
+      'drift', 'variance', 'distance', 'berry_esseen_bound', 'step_ratio' and 'safe'.
+    """
+    with np.errstate(divide='ignore'):
+        steps = [math.log1p(f_scaled * b), math.log1p(-f_scaled) if f_scaled < 1 else -np.inf, 0.0]
+    if not np.isfinite(steps[1]):
+        raise ValueError("f_scaled = 1 loses everything on the first loss; there is no diffusion limit.")
+    return _diffusion(math.log(starting_wealth / lower_threshold), steps, [p_up, p_down, max(1 - p_up - p_down, 0.0)],
+                      upper_bet_limit, continuity_correction, tolerance)
+
+
+def diffusion_fixed(starting_wealth, up_amount, p_up, down_amount, p_down, upper_bet_limit, lower_threshold,
+                    continuity_correction=True, tolerance=0.01):
+    """
+    Brownian approximation of the fixed-bet walk; the counterpart of exact_gamblers_ruin.
+
+    Wealth itself moves by +up_amount, -down_amount or 0, so it is the walk that is
+    approximated, with the same drift, variance and error bounds as diffusion_kelly.
+    The barrier is the first lattice level at or below lower_threshold. When a loss is
+    one lattice step (e.g. equal up and down amounts) the walk lands on the barrier
+    exactly, so no continuity correction is applied whatever continuity_correction says.
+    Returns the same dict.
+    """
+    unit, u, d = _lattice(up_amount, down_amount)
+    steps = [up_amount, -down_amount, 0.0]
+    return _diffusion(-_ruin_level(starting_wealth, lower_threshold, unit) * unit, steps,
+                      [p_up, p_down, max(1 - p_up - p_down, 0.0)], upper_bet_limit,
+                      continuity_correction and d > 1, tolerance)
+
+
+def print_diffusion_summary(approximation, reference=None):
+    """
+    Prints the approximation, next to a reference run if one is given.
+
+    reference can be exact_gamblers_ruin(...) or summary_statistics(simulate_paths(...)):
+    both have 'ruin_probability' and 'average_time_to_ruin'.
+    """
+    print("\n=== Diffusion Approximation ===")
+    print(f"Ruin Probability: {approximation['ruin_probability'] * 100:.4f}%", end='')
+    print(f" (reference {reference['ruin_probability'] * 100:.4f}%)" if reference else "")
+    print(f"Ruin Probability, Unlimited Bets: {approximation['ruin_probability_infinite'] * 100:.4f}%")
+    if approximation['ruin_probability'] > 0:
+        print(f"Average Time to Ruin (given ruin): {approximation['average_time_to_ruin']:.2f} bets", end='')
+        print(f" (reference {reference['average_time_to_ruin']:.2f})" if reference else "")
+    print(f"Berry-Esseen Bound: {approximation['berry_esseen_bound']:.4f}, Step Ratio: {approximation['step_ratio']:.4f}")
+    if not approximation['safe']:
+        print("Warning: outside the documented error bounds; use the exact or simulated engine.")
+    print()
@@ -0,0 +1,236 @@
+import math
+
+import numpy as np
+
+from .frontier import outcome_counts
+
+
+def _log_lattice(f_scaled, b, m_d):
+    # grid step h with the loss exactly m_d steps; the win is rounded to whole steps, which
+    # leaves the returned relative error in it
+    up, down = math.log1p(f_scaled * b), -math.log1p(-f_scaled)
+    h = down / m_d
+    m_u = max(1, round(up / h))
+    return h, m_u, abs(m_u * h - up) / up
+
+
+def _drawdown_chain(levels, m_u, m_d, p_up, p_down, ruin_level, upper_bet_limit):
+    """
+    P(drawdown reaches `levels` grid steps by each bet), stopping at ruin.
+
+    The state is (running peak, drawdown below it), both in grid steps from the start.
+    Ruin, at or below ruin_level (< 0), can only cut a path short before its drawdown
+    reaches `levels` while the peak is below levels + ruin_level; every higher peak is
+    one bucket where only the drawdown is tracked.
+    """
+    p_stay = max(1 - p_up - p_down, 0.0)
+    peaks = max(levels + ruin_level, 0) + 1         # rows 0 .. peaks - 2 exact, last row: every higher peak
+    m = np.arange(peaks)[:, None]
+    d = np.arange(levels)[None, :]
+    # a loss that doesn't reach `levels` stops the path if it lands at or below the ruin level
+    loss_ok = (m == peaks - 1) | (m - d - m_d > ruin_level)
+    loss_ok = loss_ok[:, :max(levels - m_d, 0)]
+    loss_weight = p_down * loss_ok
+    # a win from less than m_u below the peak sets a new one (capped at the last row)
+    new_peak = np.minimum(m + m_u - d[:, :m_u], peaks - 1).ravel()
+
+    keep_u, keep_d = max(levels - m_u, 0), max(levels - m_d, 0)
+    prob = np.zeros((peaks, levels))
+    prob[0, 0] = 1.0
+    nxt = np.empty_like(prob)
+    scratch = np.empty((peaks, keep_d))
+    hit_by_bet = np.zeros(upper_bet_limit + 1)
+    for t in range(1, upper_bet_limit + 1):
+        hit = p_down * prob[:, keep_d:].sum()
+        np.multiply(prob, p_stay, out=nxt)
+        nxt[:, :keep_u] += np.multiply(prob[:, m_u:], p_up, out=scratch[:, :keep_u] if keep_u <= keep_d else None)
+        nxt[:, 0] += np.bincount(new_peak, weights=p_up * prob[:, :m_u].ravel(), minlength=peaks)
+        nxt[:, m_d:] += np.multiply(prob[:, :keep_d], loss_weight, out=scratch)
+        prob, nxt = nxt, prob
+        hit_by_bet[t] = hit_by_bet[t - 1] + hit
+    return hit_by_bet
+
+
+def _spell_chain(spell, m_u, m_d, p_up, p_down, upper_bet_limit):
+    # P(some stretch of `spell` consecutive bets below the running peak by each bet), no ruin threshold:
+    # state (bets under water so far r < spell, drawdown below the peak, at most r * m_d steps)
+    p_stay = max(1 - p_up - p_down, 0.0)
+    depth = max(spell - 1, 0) * m_d + 1
+    prob = np.zeros((spell, depth))
+    prob[0, 0] = 1.0
+    nxt = np.empty_like(prob)
+    hit_by_bet = np.zeros(upper_bet_limit + 1)
+    for t in range(1, upper_bet_limit + 1):
+        # from the last row, any bet that leaves the path under water completes the spell
+        last = prob[-1]
+        hit = p_up * last[m_u + 1:].sum() + p_down * last.sum() + p_stay * last[1:].sum()
+        nxt.fill(0.0)
+        # back at (or above) the peak: the spell resets
+        nxt[0, 0] = p_up * prob[:, :m_u + 1].sum() + p_stay * prob[:, 0].sum()
+        nxt[1:, 1:] = p_stay * prob[:-1, 1:]
+        if m_u + 1 < depth:
+            # a win that stays under water (with a win of at least depth steps, none does)
+            nxt[1:, 1:depth - m_u] += p_up * prob[:-1, m_u + 1:]
+        nxt[1:, m_d:] += p_down * prob[:-1, :depth - m_d]
+        prob, nxt = nxt, prob
+        hit_by_bet[t] = hit_by_bet[t - 1] + hit
+    return hit_by_bet
+
+
+def _exact_summary(drawdowns, hit_by_bet, spells, spell_by_bet, error, m_d):
+    return {
+        'drawdowns': drawdowns,
+        'hit_probability': hit_by_bet[:, -1],
+        'hit_by_bet': hit_by_bet,
+        'spells': spells,
+        'spell_probability': spell_by_bet[:, -1],
+        'spell_by_bet': spell_by_bet,
+        'lattice_error': error,
+        'resolution': m_d,
+    }
+
+
+def exact_drawdown(starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b,
+                   drawdowns=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9), spells=(), resolution=8,
+                   tolerance=0.002, max_states=2000000):
+    """
+    Exact drawdown and time-under-water probabilities for a constant fraction, by dynamic programming.
+
+    Log-wealth moves up ln(1 + f b) or down ln(1 - f) per bet, so it lives on a lattice
+    once both moves are whole numbers of a grid step h. The loss is made exactly m_d
+    steps and the win rounded to whole steps, with m_d the first size from resolution up
+    that rounds the win to within tolerance ('lattice_error' is what is left; with Kelly
+    sizing the expected growth is small next to the moves, so it needs to be small).
+    On that lattice the probabilities are exact, however small: tails that 1000 paths
+    can't resolve.
+
+    For each drawdown fraction the program runs over (running-peak level, drawdown below
+    it), absorbing paths once their drawdown reaches it and stopping paths at the ruin
+    threshold as the scripts do. For each spell length it runs over (bets under water,
+    drawdown) for the walk without a ruin threshold.
+
+    Parameters:
+    - Same as run_single_simulation in the Kelly scripts, plus:
+    - drawdowns (sequence of float): Drawdown fractions from peak wealth (0.5 is -50%).
+    - spells (sequence of int): Time-under-water lengths, in consecutive bets below the peak.
+    - resolution (int): Fewest grid steps per losing bet.
+    - tolerance (float): Largest relative rounding error in the winning move to accept.
+    - max_states (int): Largest program to run. If no lattice within it meets tolerance
+      (small losing moves against far-away drawdowns), the most accurate one that fits is
+      used, even below resolution; if one step per loss is still too many, a ValueError
+      says to sample instead. A program costs about 10 ns per state per bet.
+
+    Returns:
+    - exact (dict): 'drawdowns' and 'hit_probability' (P(max drawdown >= each within
+      upper_bet_limit bets), so 1 - hit_probability is the distribution of the maximum
+      drawdown), 'hit_by_bet' (drawdowns x upper_bet_limit + 1, the same by each bet),
+      'spells', 'spell_probability' and 'spell_by_bet' likewise, 'lattice_error' and
+      'resolution' (the m_d used). With f_scaled <= 0 (or no room above the threshold) every
+      probability is 0, and with f_scaled >= 1 they are closed forms in the first loss; both
+      report a lattice_error and resolution of 0.
+    """
+    drawdowns = np.asarray(drawdowns, dtype=float)
+    spells = np.asarray(spells, dtype=int)
+    bets = np.arange(upper_bet_limit + 1)
+    if f_scaled <= 0 or starting_wealth <= lower_threshold:
+        # no bet ever changes wealth (the engines don't bet at all from at or below the threshold)
+        return _exact_summary(drawdowns, np.zeros((len(drawdowns), upper_bet_limit + 1)),
+                              spells, np.zeros((len(spells), upper_bet_limit + 1)), 0.0, 0)
+    if f_scaled >= 1:
+        # the first loss takes wealth to zero, a full drawdown and ruin, and until then it never
+        # falls; without a threshold the walk stays under water from that loss on, so a spell of
+        # s bets is complete by bet t iff the first loss came by bet t - s + 1
+        loss_by_bet = 1 - (1 - p_down) ** bets
+        spell_by_bet = [1 - (1 - p_down) ** np.maximum(bets - sp + 1, 0) for sp in spells]
+        return _exact_summary(drawdowns, np.tile(loss_by_bet, (len(drawdowns), 1)),
+                              spells, np.reshape(spell_by_bet, (len(spells), upper_bet_limit + 1)), 0.0, 0)
+    log_ruin = math.log(lower_threshold / starting_wealth)
+
+    def chain_sizes(h, m_d):
+        levels = [max(1, math.ceil(-math.log1p(-dd) / h - 1e-9)) for dd in drawdowns]
+        ruin_level = math.floor(log_ruin / h + 1e-9)
+        return levels, ruin_level, [lv * (max(lv + ruin_level, 0) + 1) for lv in levels] + [
+            int(sp) * ((int(sp) - 1) * m_d + 1) for sp in spells]
+
+    # the first loss size from `resolution` steps up whose win rounds to within `tolerance`;
+    # failing that, the most accurate lattice whose largest program fits max_states
+    fits = []
+    for m_d in range(1, 64 * resolution + 1):
+        h, m_u, error = _log_lattice(f_scaled, b, m_d)
+        levels, ruin_level, sizes = chain_sizes(h, m_d)
+        if max(sizes, default=0) > max_states:
+            break
+        fits.append((error, m_d, h, m_u, levels, ruin_level))
+        if m_d >= resolution and error <= tolerance:
+            break
+    if not fits:
+        raise ValueError(f"Even the coarsest lattice needs {max(sizes):,} states, over max_states={max_states:,}; "
+                         "use sample_drawdown.")
+    error, m_d, h, m_u, levels, ruin_level = min([fit for fit in fits if fit[1] >= resolution] or fits)
+
+    hit_by_bet = np.array([_drawdown_chain(lv, m_u, m_d, p_up, p_down, ruin_level, upper_bet_limit) for lv in levels])
+    hit_by_bet = hit_by_bet.reshape(len(drawdowns), upper_bet_limit + 1)
+    spell_by_bet = np.array([_spell_chain(int(sp), m_u, m_d, p_up, p_down, upper_bet_limit) for sp in spells])
+    spell_by_bet = spell_by_bet.reshape(len(spells), upper_bet_limit + 1)
+    return _exact_summary(drawdowns, hit_by_bet, spells, spell_by_bet, error, m_d)
+
+
+def sample_drawdown(num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b,
+                    drawdowns=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9), spells=(), seed=None):
+    """
+    Monte Carlo estimates of exact_drawdown's probabilities, as a cross-check.
+
+    Uses the exact (unrounded) moves, so it also checks the lattice rounding. Returns
+    'drawdowns', 'hit_probability', 'spells' and 'spell_probability' as exact_drawdown
+    does, plus their standard errors 'hit_se' and 'spell_se'.
+    """
+    rng = np.random.default_rng(seed)
+    wins, losses = outcome_counts(rng, num_simulations, upper_bet_limit, p_up, p_down)
+    # at f_scaled >= 1 a loss takes wealth to zero for good (and 0 * -inf would be nan)
+    down = math.log1p(-f_scaled) if f_scaled < 1 else -math.inf
+    with np.errstate(invalid='ignore'):
+        log_wealth = wins * math.log1p(f_scaled * b) + np.where(losses > 0, losses * down, 0.0)
+    peak = np.maximum(np.maximum.accumulate(log_wealth, axis=1), 0.0)
+    below = log_wealth - peak
+
+    # drawdowns stop at ruin like the scripts; spells are for the walk without a threshold
+    hit = log_wealth <= math.log(lower_threshold / starting_wealth)
+    last = np.where(hit.any(axis=1), hit.argmax(axis=1), upper_bet_limit - 1)
+    below_stopped = np.where(np.arange(upper_bet_limit) > last[:, None], 0.0, below)
+    max_drawdown = 1 - np.exp(below_stopped.min(axis=1))
+    drawdowns = np.asarray(drawdowns, dtype=float)
+    hit_probability = (max_drawdown[None, :] >= drawdowns[:, None] - 1e-12).mean(axis=1)
+
+    under = below < 0
+    index = np.arange(upper_bet_limit)
+    last_at_peak = np.maximum.accumulate(np.where(under, -1, index), axis=1)
+    longest = (index - last_at_peak).max(axis=1)
+    spells = np.asarray(spells, dtype=int)
+    spell_probability = (longest[None, :] >= spells[:, None]).mean(axis=1)
+
+    n = num_simulations
+    return {
+        'drawdowns': drawdowns,
+        'hit_probability': hit_probability,
+        'hit_se': np.sqrt(hit_probability * (1 - hit_probability) / n),
+        'spells': spells,
+        'spell_probability': spell_probability,
+        'spell_se': np.sqrt(spell_probability * (1 - spell_probability) / n),
+    }
+
+
+def print_drawdown_summary(exact, sampled=None):
+
+    print("\n=== Drawdown Distribution ===")
+    for i, dd in enumerate(exact['drawdowns']):
+        line = f"P(drawdown >= {dd:.0%}): {exact['hit_probability'][i]:.6g}"
+        if sampled is not None:
+            line += f" (sampled {sampled['hit_probability'][i]:.4f} ± {sampled['hit_se'][i]:.4f})"
+        print(line)
+    for i, spell in enumerate(exact['spells']):
+        line = f"P(>= {spell} bets under water in a row): {exact['spell_probability'][i]:.6g}"
+        if sampled is not None:
+            line += f" (sampled {sampled['spell_probability'][i]:.4f} ± {sampled['spell_se'][i]:.4f})"
+        print(line)
+    print(f"Lattice rounding of the winning move: {exact['lattice_error']:.3%}")
+    print()
@@ -0,0 +1,97 @@
+import numpy as np
+
+
+def _interp_plan(x, points):
+    # precomputed gather indices/weights for reading the value function at points that
+    # don't depend on the bets remaining (x + log(1 + f*b), x + log(1 - f))
+    idx = np.clip(np.searchsorted(x, points, side='right') - 1, 0, len(x) - 2)
+    with np.errstate(invalid='ignore'):
+        weight = (points - x[idx]) / (x[idx + 1] - x[idx])
+    absorbed = points <= x[0]
+    return idx, weight, absorbed, points
+
+
+def _apply_plan(plan, ce):
+    idx, weight, absorbed, points = plan
+    # linear in log-wealth inside the grid, extrapolated along the last segment above it;
+    # at or below the barrier the path has stopped, so its value is just the wealth it stopped at
+    inside = ce[idx] * (1 - weight) + ce[idx + 1] * weight
+    return np.where(absorbed, points, inside)
+
+
+def solve_dynamic_policy(p_up, p_down, b, g, upper_bet_limit, lower_threshold, w_max,
+                         num_wealth=256, num_fractions=201):
+    """
+    Finite-horizon CRRA-optimal bet fraction by backward induction under the ruin barrier.
+
+    Works on a log-spaced wealth grid from lower_threshold to w_max and a grid of
+    fractions in [0, 1], vectorized over both. Values are carried as log certainty
+    equivalents, which stay O(log W) for every g and extrapolate linearly above the grid.
+    The chosen fraction is refined with a parabola through the best fraction and its
+    neighbours.
+
+    Parameters:
+    - p_up (float): Probability of winning each bet (the bettor's belief).
+    - p_down (float): Probability of losing each bet.
+    - b (float): Net odds (b to 1).
+    - g (float): Relative risk aversion coefficient (1 for log utility).
+    - upper_bet_limit (int): Number of bets in the horizon.
+    - lower_threshold (float): Ruin threshold; betting stops once wealth <= lower_threshold.
+      Must be positive, since the log-wealth grid starts there; for no barrier, pass a
+      floor well below any wealth the paths can reach.
+    - w_max (float): Top of the wealth grid.
+    - num_wealth (int): Number of wealth grid points.
+    - num_fractions (int): Number of candidate fractions in [0, 1].
+
+    Returns:
+    - grid (ndarray): Wealth levels, shape (num_wealth,).
+    - table (ndarray): Optimal fraction, shape (upper_bet_limit, num_wealth); row n - 1 is
+      for n bets remaining.
+    - certainty_equivalent (ndarray): Certainty-equivalent final wealth at each grid level
+      with all upper_bet_limit bets remaining.
+    """
+    if lower_threshold <= 0:
+        raise ValueError(f"lower_threshold={lower_threshold:g}: the log-wealth grid needs a positive bottom; "
+                         "for no ruin barrier, pass a small positive floor instead.")
+    grid = np.geomspace(lower_threshold, w_max, num_wealth)
+    x = np.log(grid)
+    fractions = np.linspace(0.0, 1.0, num_fractions)
+    df = fractions[1] - fractions[0]
+    p_stay = max(1.0 - p_up - p_down, 0.0)
+
+    with np.errstate(divide='ignore'):
+        win = _interp_plan(x, x[:, None] + np.log1p(fractions * b)[None, :])
+        lose = _interp_plan(x, x[:, None] + np.log1p(-fractions)[None, :])
+
+    rows = np.arange(num_wealth)
+    table = np.empty((upper_bet_limit, num_wealth))
+    ce = x.copy()   # no bets remaining: the certainty equivalent is the wealth itself
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for n in range(1, upper_bet_limit + 1):
+            ce_win = _apply_plan(win, ce)
+            ce_lose = _apply_plan(lose, ce)
+            ce_stay = ce[:, None]
+
+            if g == 1:
+                value = p_up * ce_win + p_down * ce_lose + p_stay * ce_stay
+            else:
+                e = 1 - g
+                rel = x[:, None]
+                mean_u = (p_up * np.exp(e * (ce_win - rel)) + p_down * np.exp(e * (ce_lose - rel))
+                          + p_stay * np.exp(e * (ce_stay - rel)))
+                value = rel + np.log(mean_u) / e
+            value[np.isnan(value)] = -np.inf
+
+            best = np.argmax(value, axis=1)
+            ce = value[rows, best]
+            ce[0] = x[0]
+
+            # parabolic refinement of the argmax between neighbouring fractions
+            inner = np.clip(best, 1, num_fractions - 2)
+            v0, v1, v2 = value[rows, inner - 1], value[rows, inner], value[rows, inner + 1]
+            curv = v0 - 2 * v1 + v2
+            shift = np.where((best == inner) & (curv < 0) & np.isfinite(curv), 0.5 * (v0 - v2) / curv, 0.0)
+            table[n - 1] = np.clip(fractions[best] + shift * df, 0.0, 1.0)
+
+    return grid, table, np.exp(ce)
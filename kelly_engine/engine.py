@@ -0,0 +1,353 @@
+import math
+
+import numpy as np
+
+from .timing import untimed
+
+# bytes per simulated path, from tracemalloc peaks: the output arrays together with the
+# temporaries of log_wealth_statistics at the end (about 145), and the working state plus
+# the temporaries of one step; then per path and bet of a random block, the block itself
+# and its copy while ruined paths are compacted out
+_OUTPUT_BYTES = 150
+_STATE_BYTES = 240
+_DRAW_BYTES = 16
+
+
+def simulate_paths(num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b,
+                   f_scaled=None, policy=None, seed=None, keep_histories=0, outcome_memory=0, max_bytes=2e9,
+                   sample_probabilities=None):
+    """
+    Simulates all paths at once, one bet per step across the whole batch.
+
+    Each step applies exactly the scripts' update (win: += wager * b, lose: -= wager,
+    otherwise no change) to every live path, so the statistics match
+    run_single_simulation; only the random stream differs. Ruined paths are compacted
+    out of the working set, so the cost of a step follows the number still alive.
+
+    Parameters:
+    - num_simulations (int): Number of paths.
+    - starting_wealth (float): Initial wealth of every path.
+    - p_up (float): Probability of winning each bet.
+    - p_down (float): Probability of losing each bet (1 - p_up - p_down is "no change").
+    - upper_bet_limit (int): Maximum number of bets per path.
+    - lower_threshold (float): Ruin threshold; a path stops once wealth <= lower_threshold.
+    - b (float): Net odds (b to 1).
+    - f_scaled (float): Constant fraction of wealth wagered each bet (ignored if policy is given).
+    - policy (callable): policy(state) -> fraction for each path, for state-dependent
+      strategies. Called once per step on the surviving paths; state is a dict of per-path
+      arrays 'wealth', 'peak_wealth', 'drawdown' (1 - wealth / peak_wealth), 'active' and
+      'recent_outcomes' (last outcome_memory bets, oldest first: +1 win, -1 loss,
+      0 no change or no bet), plus the current 'bet_index' (1-based int).
+    - seed (int, Generator or None): Seed for numpy's default_rng.
+    - keep_histories (int): Number of leading paths whose full wealth history is kept.
+    - outcome_memory (int): Number of recent outcomes kept per path for the policy.
+    - max_bytes (float): Memory budget. Paths are simulated in chunks, and random draws
+      made in blocks of bets, as large as fit (see chunk_sizes); kept histories are
+      capped at half the budget.
+    - sample_probabilities (tuple): (p_up, p_down) to draw the outcomes with instead, for
+      importance sampling. Every outcome with a positive probability must keep one.
+
+    Returns:
+    - results (dict): Per-path arrays 'final_wealth', 'peak_wealth', 'min_wealth',
+      'went_bankrupt', 'bet_count', 'mean_log_wealth', 'std_log_wealth',
+      'slope_log_wealth', plus 'histories' (list of arrays, one per kept path). With
+      sample_probabilities, also 'log_weight': each path's log likelihood ratio of the
+      true to the sampling probabilities over the bets it placed.
+    """
+    rng = np.random.default_rng(seed)
+    n = num_simulations
+    if sample_probabilities is None:
+        draw_up, draw_down = p_up, p_down
+    else:
+        draw_up, draw_down = sample_probabilities
+        pairs = ((p_up, draw_up), (p_down, draw_down), (max(1 - p_up - p_down, 0.0), max(1 - draw_up - draw_down, 0.0)))
+        if any(p > 0 and q <= 0 for p, q in pairs):
+            raise ValueError("sample_probabilities must give every possible outcome a positive probability.")
+        # log likelihood ratio of a win, a loss and no change (outcomes that can't occur get 0)
+        ratios = [math.log(p / q) if p > 0 else 0.0 for p, q in pairs]
+    path_chunk, step_block, keep = chunk_sizes(n, upper_bet_limit, min(keep_histories, n), outcome_memory, max_bytes)
+
+    final_wealth = np.full(n, float(starting_wealth))
+    peak_wealth = final_wealth.copy()
+    min_wealth = final_wealth.copy()
+    bet_count = np.zeros(n, dtype=np.int64)
+    went_bankrupt = np.zeros(n, dtype=bool)
+    sums = np.zeros((3, n))
+    log_weight = np.zeros(n)
+    history = np.empty((keep, upper_bet_limit + 1))
+    history[:, 0] = starting_wealth
+
+    # running sums for the log-wealth mean/std/slope, relative to log(starting_wealth)
+    log_start = np.log(starting_wealth)
+
+    def write_back(rows):
+        ids = paths[rows]
+        final_wealth[ids] = wealth[rows]
+        peak_wealth[ids] = peak[rows]
+        min_wealth[ids] = low[rows]
+        bet_count[ids] = count[rows]
+        went_bankrupt[ids] = ~active[rows]
+        sums[:, ids] = path_sums[:, rows]
+        log_weight[ids] = path_weight[rows]
+
+    for first in range(0, n if starting_wealth > lower_threshold else 0, path_chunk):
+        # working set: only the rows in `paths` are simulated; ruined rows are written back
+        # and dropped whenever they make up a quarter of the working set
+        paths = np.arange(first, min(first + path_chunk, n))
+        wealth = final_wealth[paths]
+        peak = wealth.copy()
+        low = wealth.copy()
+        count = np.zeros(len(paths), dtype=np.int64)
+        path_sums = np.zeros((3, len(paths)))
+        path_weight = np.zeros(len(paths))
+        recent = np.zeros((len(paths), outcome_memory), dtype=np.int8)
+        active = np.ones(len(paths), dtype=bool)
+        num_active = len(paths)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for t in range(1, upper_bet_limit + 1):
+                if num_active == 0:
+                    break
+                if (t - 1) % step_block == 0:
+                    # one draw per bet for the next step_block bets of the working set
+                    outcomes = rng.random((min(step_block, upper_bet_limit - t + 1), len(paths)))
+                if num_active <= 0.75 * len(paths):
+                    write_back(~active)
+                    paths, wealth, peak, low, count, recent = (x[active] for x in (paths, wealth, peak, low, count, recent))
+                    path_sums = path_sums[:, active]
+                    path_weight = path_weight[active]
+                    outcomes = outcomes[:, active]
+                    active = active[active]
+                if paths[0] < keep:
+                    kept = paths < keep
+                    kept_ids = paths[kept]
+
+                outcome = outcomes[(t - 1) % step_block]
+                if policy is None:
+                    f = f_scaled
+                else:
+                    state = {
+                        'wealth': wealth,
+                        'peak_wealth': peak,
+                        'drawdown': 1.0 - wealth / peak,
+                        'bet_index': t,
+                        'recent_outcomes': recent,
+                        'active': active,
+                    }
+                    f = policy(state)
+
+                # calculate wager_amount as a fraction of current wealth
+                wager_amount = wealth * f
+                won = outcome < draw_up
+                lost = ~won & (outcome < draw_up + draw_down)
+                new_wealth = np.where(won, wealth + wager_amount * b, np.where(lost, wealth - wager_amount, wealth))
+                wealth = np.where(active, new_wealth, wealth)
+                if outcome_memory:
+                    recent[:, :-1] = recent[:, 1:]
+                    recent[:, -1] = np.where(active, won.astype(np.int8) - lost, 0)
+                if sample_probabilities is not None:
+                    path_weight += np.where(active, np.where(won, ratios[0], np.where(lost, ratios[1], ratios[2])), 0.0)
+
+                d = np.where(active, np.log(wealth) - log_start, 0.0)
+                path_sums[0] += d
+                path_sums[1] += d * d
+                path_sums[2] += t * d
+                count += active
+                np.maximum(peak, wealth, out=peak)
+                np.minimum(low, wealth, out=low)
+                if paths[0] < keep:
+                    history[kept_ids, t] = wealth[kept]
+
+                # check which paths hit the lower threshold on this bet
+                hit = active & (wealth <= lower_threshold)
+                active &= ~hit
+                num_active -= int(hit.sum())
+
+        write_back(np.ones(len(paths), dtype=bool))
+
+    results = {
+        'final_wealth': final_wealth,
+        'peak_wealth': peak_wealth,
+        'min_wealth': min_wealth,
+        'went_bankrupt': went_bankrupt,
+        'bet_count': bet_count,
+        'histories': [history[i, :bet_count[i] + 1] for i in range(keep)],
+    }
+    results.update(log_wealth_statistics(bet_count + 1, *sums, log_start))
+    if sample_probabilities is not None:
+        results['log_weight'] = log_weight
+    return results
+
+
+def chunk_sizes(num_simulations, upper_bet_limit, keep_histories, outcome_memory=0, max_bytes=2e9):
+    """
+    Splits a run into path chunks and blocks of bets that fit in max_bytes.
+
+    The per-path outputs (with room for finalizing the log-wealth statistics) and the
+    kept histories are allocated once; the rest of the budget holds one chunk of working
+    state plus a block of random draws, i.e. path_chunk * (state + 16 * step_block)
+    bytes. Blocks of up to 256 bets are preferred and the path chunk takes whatever is
+    left; the block only shrinks when a single path can't hold it.
+
+    Returns:
+    - path_chunk (int): Paths simulated together.
+    - step_block (int): Bets drawn per random block.
+    - keep_histories (int): Histories kept, reduced (with a warning) to half the budget.
+    """
+    n, L = num_simulations, upper_bet_limit
+    budget = max_bytes - n * _OUTPUT_BYTES
+    if budget < _STATE_BYTES + 2 * outcome_memory + _DRAW_BYTES:
+        raise ValueError(f"max_bytes={max_bytes:g} cannot hold the results of {n} simulations.")
+
+    row = (L + 1) * 8
+    keep = min(keep_histories, int(budget // 2 // row))
+    if keep < keep_histories:
+        print(f"Warning: memory budget only fits {keep} of {keep_histories} wealth histories; keeping {keep}.")
+    budget -= keep * row
+
+    state = _STATE_BYTES + 2 * outcome_memory
+    block = min(L, 256)
+    path_chunk = max(1, min(n, int(budget // (state + _DRAW_BYTES * block))))
+    step_block = max(1, min(block, int(budget // path_chunk - state) // _DRAW_BYTES))
+    return path_chunk, step_block, keep
+
+
+def log_wealth_statistics(num_points, sum_d, sum_dd, sum_td, log_start):
+    """
+    Mean, std and least-squares slope of each path's log-wealth history from running sums.
+
+    Equivalent to np.mean, np.std and np.polyfit(range(n), log_wealth, 1)[0] on the full
+    history, with d = log_wealth - log_start and t the bet number of each point.
+    """
+    n = num_points.astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_d = sum_d / n
+        var = np.maximum(sum_dd / n - mean_d**2, 0.0)
+        sum_t = n * (n - 1) / 2
+        sum_tt = (n - 1) * n * (2 * n - 1) / 6
+        denom = n * sum_tt - sum_t**2
+        slope = np.where(denom > 0, (n * sum_td - sum_t * sum_d) / denom, 0.0)
+    return {
+        'mean_log_wealth': log_start + mean_d,
+        'std_log_wealth': np.sqrt(var),
+        'slope_log_wealth': slope,
+    }
+
+
+def results_dataframe(results):
+
+    # pandas is only loaded when a DataFrame is asked for, so compute-only runs don't pay for it
+    import pandas as pd
+
+    # dataframe w/ all individual sim stats, same columns the scripts write to CSV
+    n = len(results['final_wealth'])
+    data = {
+        'Simulation': range(1, n + 1),
+        'Mean_Log_Wealth': results['mean_log_wealth'],
+        'Std_Log_Wealth': results['std_log_wealth'],
+        'Slope_Log_Wealth': results['slope_log_wealth'],
+        'Time_to_Ruin': np.where(results['went_bankrupt'], results['bet_count'], np.nan),
+        'Peak_Wealth': results['peak_wealth'],
+        'Min_Wealth': results['min_wealth'],
+        'Final_Wealth': results['final_wealth'],
+    }
+    return pd.DataFrame(data)
+
+
+def summary_statistics(results):
+    """
+    The numbers print_summary reports, as a dict of plain Python floats and ints.
+
+    For batch and worker runs that only need the summary: no printing, no DataFrame,
+    and the dict pickles / serializes cheaply.
+    """
+    final_wealths = results['final_wealth']
+    went_bankrupt = results['went_bankrupt']
+    bet_count = results['bet_count']
+    ruin_count = int(went_bankrupt.sum())
+    return {
+        'num_simulations': len(final_wealths),
+        'ruin_count': ruin_count,
+        'ruin_probability': ruin_count / len(final_wealths),
+        'average_final_wealth': float(final_wealths.mean()),
+        'median_final_wealth': float(np.median(final_wealths)),
+        'average_peak_wealth': float(results['peak_wealth'].mean()),
+        'highest_peak_wealth': float(results['peak_wealth'].max()),
+        'average_min_wealth': float(results['min_wealth'].mean()),
+        'smallest_min_wealth': float(results['min_wealth'].min()),
+        'average_time_to_ruin': float(bet_count[went_bankrupt].mean()) if ruin_count else float('nan'),
+        'mean_log_wealth': float(results['mean_log_wealth'].mean()),
+        'std_log_wealth': float(results['std_log_wealth'].mean()),
+        'slope_log_wealth': float(results['slope_log_wealth'].mean()),
+    }
+
+
+def print_summary(results):
+
+    final_wealths = results['final_wealth']
+    went_bankrupt = results['went_bankrupt']
+    bet_count = results['bet_count']
+    num_simulations = len(final_wealths)
+    ruin_count = int(went_bankrupt.sum())
+    ruin_probability = (ruin_count / num_simulations) * 100
+
+    # final summary
+    print("\n=== All Simulations Summary ===")
+    print(f"Total Simulations Run: {num_simulations}")
+    print(f"Ruin Occurred in {ruin_count} Simulations ({ruin_probability:.2f}%)")
+    print(f"Average Final Wealth: {final_wealths.mean():.2f}")
+    print(f"Average Peak Wealth Achieved: {results['peak_wealth'].mean():.2f}")
+    print(f"Highest Peak Wealth Achieved: {results['peak_wealth'].max()}")
+    print(f"Average Minimum Wealth Achieved: {results['min_wealth'].mean():.2f}")
+    print(f"Smallest Minimum Wealth Achieved: {results['min_wealth'].min()}")
+    print(f"Highest Final Wealth Achieved: {final_wealths.max()}")
+
+    if ruin_count > 0:
+        max_bets_before_ruin = bet_count[went_bankrupt].max()
+        sims = np.flatnonzero(went_bankrupt & (bet_count == max_bets_before_ruin)) + 1
+        print(f"Simulation(s) that hit ruin and survived the most bets ({max_bets_before_ruin} bets): {sims.tolist()}")
+        print(f"Average Time to Ruin: {bet_count[went_bankrupt].mean():.2f} bets")
+    else:
+        print("No simulations ended in ruin.")
+        print("No simulations ended in ruin. Average Time to Ruin is undefined.")
+
+    print(f"Mean of Log-Wealth: {results['mean_log_wealth'].mean():.4f}")
+    print(f"Standard Deviation of Log-Wealth: {results['std_log_wealth'].mean():.4f}")
+    print(f"Average Slope of Log-Wealth: {results['slope_log_wealth'].mean():.10f}")
+
+    print()
+
+
+def run_multiple_simulations(num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b,
+                             policy=None, seed=None, keep_histories=None, outcome_memory=0, max_bytes=2e9,
+                             phase=untimed):
+    """
+    Drop-in replacement for the scripts' run_multiple_simulations on top of simulate_paths.
+
+    Takes the same positional arguments and returns the same tuple, so the plotting and
+    CSV code in the scripts works unchanged. keep_histories defaults to every path, as
+    far as max_bytes allows. phase is a phase() from phase_timer to time the simulation
+    (per-path statistics are accumulated inside it) and the DataFrame build.
+    """
+    if keep_histories is None:
+        keep_histories = num_simulations
+    with phase("path simulation"):
+        results = simulate_paths(
+            num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b,
+            f_scaled=f_scaled, policy=policy, seed=seed, keep_histories=keep_histories, outcome_memory=outcome_memory,
+            max_bytes=max_bytes,
+        )
+    with phase("DataFrame build"):
+        simulation_df = results_dataframe(results)
+    print_summary(results)
+
+    return (
+        results['final_wealth'].tolist(),
+        results['peak_wealth'].tolist(),
+        results['min_wealth'].tolist(),
+        results['histories'],
+        int(results['went_bankrupt'].sum()),
+        results['min_wealth'].min(),
+        results['peak_wealth'].max(),
+        simulation_df,
+    )
@@ -0,0 +1,234 @@
+import math
+from fractions import Fraction
+
+import numpy as np
+
+
+def _lattice(up_amount, down_amount):
+    # express +up_amount / -down_amount as integer multiples of a common wealth unit,
+    # e.g. +22 / -20 -> unit 2, +11 / -10
+    up = Fraction(up_amount).limit_denominator(10**6)
+    down = Fraction(down_amount).limit_denominator(10**6)
+    unit = Fraction(math.gcd(up.numerator * down.denominator, down.numerator * up.denominator),
+                    up.denominator * down.denominator)
+    if unit == 0:
+        return 1.0, 0, 0
+    u, d = int(up / unit), int(down / unit)
+    unit = float(unit)
+    if not (math.isclose(u * unit, up_amount, rel_tol=1e-9) and math.isclose(d * unit, down_amount, rel_tol=1e-9)):
+        raise ValueError(f"up_amount={up_amount} and down_amount={down_amount} don't share a usable wealth unit.")
+    return unit, u, d
+
+
+def _ruin_level(starting_wealth, lower_threshold, unit):
+    # largest lattice offset k with starting_wealth + k * unit <= lower_threshold
+    return math.floor((lower_threshold - starting_wealth) / unit + 1e-9)
+
+
+def simulate_fixed_paths(num_simulations, starting_wealth, up_amount, p_up, down_amount, p_down, upper_bet_limit,
+                         lower_threshold, seed=None, keep_histories=0, block_size=1000, block_elements=2**22):
+    """
+    Vectorized fixed-bet (additive) random walks on an integer lattice.
+
+    Wealth is starting_wealth + k * unit, where each bet moves k by +u (win), -d (loss)
+    or 0, so a block of bets for every live path is one integer cumsum. Paths that hit
+    ruin are dropped before the next block is drawn.
+
+    Parameters:
+    - Same as run_single_simulation in the fixed-bet script, plus:
+    - seed (int, Generator or None): Seed for numpy's default_rng.
+    - keep_histories (int): Number of leading paths whose wealth history is kept.
+    - block_size (int): Most bets drawn per block.
+    - block_elements (int): Cap on paths x bets per block, bounding memory.
+
+    Returns:
+    - results (dict): Per-path arrays 'final_wealth', 'peak_wealth', 'min_wealth',
+      'went_bankrupt', 'bet_count', plus 'histories' (list of arrays).
+    """
+    rng = np.random.default_rng(seed)
+    unit, u, d = _lattice(up_amount, down_amount)
+    k_ruin = _ruin_level(starting_wealth, lower_threshold, unit)
+    n = num_simulations
+    keep = min(keep_histories, n)
+
+    k = np.zeros(n, dtype=np.int64)
+    peak = np.zeros(n, dtype=np.int64)
+    low = np.zeros(n, dtype=np.int64)
+    bet_count = np.zeros(n, dtype=np.int64)
+    went_bankrupt = np.zeros(n, dtype=bool)
+    alive = np.flatnonzero(np.full(n, starting_wealth > lower_threshold))
+    history = np.zeros((keep, upper_bet_limit + 1), dtype=np.int64)
+
+    start = 0
+    while start < upper_bet_limit and alive.size:
+        # keep a block around block_elements draws however many paths are still alive
+        m = max(1, min(block_size, block_elements // alive.size, upper_bet_limit - start))
+
+        outcome = rng.random((alive.size, m))
+        if p_up + p_down < 1:
+            steps = np.where(outcome < p_up, np.int32(u), np.where(outcome < p_up + p_down, np.int32(-d), np.int32(0)))
+        else:
+            steps = np.where(outcome < p_up, np.int32(u), np.int32(-d))
+        path = np.cumsum(steps, axis=1, dtype=np.int64)
+        path += k[alive, None]
+
+        # bets actually placed in this block: up to and including the first ruin
+        hit = path <= k_ruin
+        ruined = hit.any(axis=1)
+        used = np.where(ruined, hit.argmax(axis=1) + 1, m)
+
+        block_peak = path.max(axis=1)
+        block_low = path.min(axis=1)
+        if ruined.any():
+            # ruined rows keep drawing after their ruin bet; only count bets actually placed
+            rows = np.flatnonzero(ruined)
+            placed = np.arange(m) < used[rows, None]
+            block_peak[rows] = np.where(placed, path[rows], np.iinfo(np.int64).min).max(axis=1)
+            block_low[rows] = np.where(placed, path[rows], np.iinfo(np.int64).max).min(axis=1)
+        peak[alive] = np.maximum(peak[alive], block_peak)
+        low[alive] = np.minimum(low[alive], block_low)
+        k[alive] = path[np.arange(alive.size), used - 1]
+        bet_count[alive] += used
+        went_bankrupt[alive] = ruined
+
+        kept = alive < keep
+        history[alive[kept], start + 1:start + 1 + m] = path[kept]
+        alive = alive[~ruined]
+        start += m
+
+    results = {
+        'final_wealth': starting_wealth + unit * k,
+        'peak_wealth': starting_wealth + unit * peak,
+        'min_wealth': starting_wealth + unit * low,
+        'went_bankrupt': went_bankrupt,
+        'bet_count': bet_count,
+        'histories': [starting_wealth + unit * history[i, :bet_count[i] + 1] for i in range(keep)],
+    }
+    return results
+
+
+def exact_gamblers_ruin(starting_wealth, up_amount, p_up, down_amount, p_down, upper_bet_limit, lower_threshold):
+    """
+    Exact ruin probability, final-wealth distribution and first-passage times for fixed bets.
+
+    Propagates the probability of every wealth level between the ruin barrier and the
+    highest reachable level through upper_bet_limit bets. One bet is the banded transition
+    matrix (+u with p_up, -d with p_down, stay otherwise, absorbing at or below the
+    barrier), applied as three shifted adds over the level vector.
+
+    Parameters:
+    - Same as run_single_simulation in the fixed-bet script.
+
+    Returns:
+    - exact (dict): 'ruin_probability', 'first_passage' (probability of ruin on bet t,
+      index t = 0..upper_bet_limit), 'wealth_levels' and 'final_wealth_probabilities'
+      (distribution of final wealth), 'average_final_wealth' and 'average_time_to_ruin'
+      (given ruin).
+    """
+    unit, u, d = _lattice(up_amount, down_amount)
+    k_ruin = _ruin_level(starting_wealth, lower_threshold, unit)
+    p_stay = max(1.0 - p_up - p_down, 0.0)
+    first_passage = np.zeros(upper_bet_limit + 1)
+
+    if k_ruin >= 0:
+        # already at or below the threshold: no bets are placed
+        levels = np.array([starting_wealth], dtype=float)
+        probs = np.ones(1)
+        return {
+            'ruin_probability': 0.0,
+            'first_passage': first_passage,
+            'wealth_levels': levels,
+            'final_wealth_probabilities': probs,
+            'average_final_wealth': float(starting_wealth),
+            'average_time_to_ruin': np.nan,
+        }
+
+    lo = k_ruin - d + 1 if d > 0 else k_ruin    # lowest level a losing bet can land on
+    hi = u * upper_bet_limit
+    prob = np.zeros(hi - lo + 1)
+    prob[-lo] = 1.0
+    n_absorbing = k_ruin - lo + 1               # levels lo..k_ruin are absorbing
+
+    absorbed_total = 0.0
+    for t in range(1, upper_bet_limit + 1):
+        live = prob[n_absorbing:].copy()
+        prob[n_absorbing:] = p_stay * live
+        if u > 0:
+            prob[n_absorbing + u:] += p_up * live[:len(live) - u]
+        if d > 0:
+            prob[n_absorbing - d:len(prob) - d] += p_down * live
+        else:
+            prob[n_absorbing:] += p_down * live
+        absorbed = prob[:n_absorbing].sum()
+        first_passage[t] = absorbed - absorbed_total
+        absorbed_total = absorbed
+
+    levels = starting_wealth + unit * np.arange(lo, hi + 1)
+    reachable = prob > 0
+    ruin_probability = absorbed_total
+    times = np.arange(upper_bet_limit + 1)
+    return {
+        'ruin_probability': ruin_probability,
+        'first_passage': first_passage,
+        'wealth_levels': levels[reachable],
+        'final_wealth_probabilities': prob[reachable],
+        'average_final_wealth': float(prob @ levels),
+        'average_time_to_ruin': float(first_passage @ times / ruin_probability) if ruin_probability > 0 else np.nan,
+    }
+
+
+def run_fixed_bet_simulations(num_simulations, starting_wealth, up_amount, p_up, down_amount, p_down, upper_bet_limit,
+                              lower_threshold, seed=None, keep_histories=None):
+    """
+    Drop-in replacement for the fixed-bet script's run_multiple_simulations on the lattice engine.
+
+    Same arguments, same printed summary and same returned tuple. keep_histories defaults
+    to every path.
+    """
+    if keep_histories is None:
+        keep_histories = num_simulations
+    results = simulate_fixed_paths(
+        num_simulations, starting_wealth, up_amount, p_up, down_amount, p_down, upper_bet_limit, lower_threshold,
+        seed=seed, keep_histories=keep_histories,
+    )
+    final_wealths = results['final_wealth']
+    peak_wealths = results['peak_wealth']
+    min_wealths = results['min_wealth']
+    went_bankrupt = results['went_bankrupt']
+    bet_count = results['bet_count']
+    ruin_count = int(went_bankrupt.sum())
+    ruin_probability = (ruin_count / num_simulations) * 100
+
+    # FINAL SUMMARY
+    print("\n=== All Simulations Summary ===")
+    print(f"Total Simulations Run: {num_simulations}")
+    print(f"Ruin Occurred in {ruin_count} Simulations ({ruin_probability:.2f}%)")
+    print(f"Average Final Wealth: {final_wealths.mean():.2f}")
+    print(f"Average Peak Wealth Achieved: {peak_wealths.mean():.2f}")
+    print(f"Average Minimum Wealth Achieved: {min_wealths.mean():.2f}")
+    print(f"Smallest Minimum Wealth Achieved: {min_wealths.min()}")
+    print(f"Highest Peak Wealth Achieved: {peak_wealths.max()}")
+
+    if ruin_count > 0:
+        max_bets_before_ruin = bet_count[went_bankrupt].max()
+        sims = np.flatnonzero(went_bankrupt & (bet_count == max_bets_before_ruin)) + 1
+        print(f"Simulation(s) that hit ruin and survived the most bets ({max_bets_before_ruin} bets): {sims.tolist()}")
+    else:
+        print("No simulations ended in ruin.")
+
+    print()
+
+    return (final_wealths.tolist(), peak_wealths.tolist(), min_wealths.tolist(), results['histories'],
+            ruin_count, min_wealths.min(), peak_wealths.max())
+
+
+def print_exact_summary(exact):
+
+    print("\n=== Exact Distribution Summary ===")
+    print(f"Ruin Probability: {exact['ruin_probability'] * 100:.4f}%")
+    print(f"Average Final Wealth: {exact['average_final_wealth']:.2f}")
+    if exact['ruin_probability'] > 0:
+        print(f"Average Time to Ruin (given ruin): {exact['average_time_to_ruin']:.2f} bets")
+    else:
+        print("Ruin is impossible within the bet limit.")
+    print()
@@ -0,0 +1,110 @@
+import numpy as np
+
+# bytes per path and bet while a chunk is evaluated: the two outcome counts plus the
+# log-wealth, ruin mask, running peak and scratch arrays for one scale at a time
+_FRONTIER_BYTES = 2 * 4 + 1 + 4 * 8
+# bytes per scale and path kept for the results: final log-wealth, maximum drawdown and the ruin flag
+_RESULT_BYTES = 8 + 8 + 1
+
+
+def outcome_counts(rng, num_paths, upper_bet_limit, p_up, p_down):
+    # running win and loss counts after each bet, drawn with the scripts' thresholds
+    draws = rng.random((num_paths, upper_bet_limit))
+    wins = np.cumsum(draws < p_up, axis=1, dtype=np.int32)
+    losses = np.cumsum((draws >= p_up) & (draws < p_up + p_down), axis=1, dtype=np.int32)
+    return wins, losses
+
+
+def kelly_frontier(num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b, f_star,
+                   scales=None, quantiles=(0.5, 0.9, 0.99), seed=None, max_bytes=2e9):
+    """
+    Growth vs. ruin trade-off over a dense grid of Kelly scales, on one shared outcome stream.
+
+    Every path's wins and losses are drawn once. With a constant fraction f, log-wealth
+    after t bets is ln W0 + wins_t ln(1 + f b) + losses_t ln(1 - f), so each scale is a
+    few array operations on the same outcome counts (common random numbers) instead of
+    a fresh simulation. Neighbouring scales therefore differ only by the change in
+    strategy, not by noise, and the curve comes out smooth. A path stops at the first bet
+    that takes it to lower_threshold or below, exactly as in the scripts.
+
+    Parameters:
+    - num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b:
+      As in simulate_paths.
+    - f_star (float): Unscaled optimal fraction; each point bets clip(f_star * scale, 0, 1).
+    - scales (array_like): Scale grid (default 201 points from 0 to 2).
+    - quantiles (sequence of float): Quantiles of each path's maximum drawdown to report.
+    - seed (int, Generator or None): Seed for the shared outcome stream.
+    - max_bytes (float): Memory budget. The per-path results of every scale (17 bytes per
+      scale and path, e.g. 3.4 GB for 201 scales x 10^6 paths) are allocated first and
+      paths are processed in chunks that fit the rest.
+
+    Returns:
+    - frontier (dict of ndarray, one entry per scale): 'scale', 'f_scaled',
+      'mean_log_growth' and 'median_log_growth' (ln(final / starting wealth) per bet
+      of the limit, ruined paths counted at their ruin wealth), 'theory_log_growth'
+      (closed form, no threshold), 'ruin_probability', 'drawdown_quantiles' (scales x
+      quantiles, maximum drawdown as a fraction of peak wealth) and 'quantiles'.
+    """
+    scales = np.linspace(0.0, 2.0, 201) if scales is None else np.asarray(scales, dtype=float)
+    f = np.clip(f_star * scales, 0.0, 1.0)
+    up = np.log1p(f * b)
+    with np.errstate(divide='ignore'):
+        down = np.log1p(-f)
+    rng = np.random.default_rng(seed)
+    n, L = num_simulations, upper_bet_limit
+    log_start, log_threshold = np.log(starting_wealth), np.log(lower_threshold)
+
+    budget = max_bytes - len(scales) * n * _RESULT_BYTES
+    if budget < _FRONTIER_BYTES * L + 8:
+        raise ValueError(f"max_bytes={max_bytes:g} cannot hold the results of {len(scales)} scales x {n} paths "
+                         f"({len(scales) * n * _RESULT_BYTES:.3g} bytes); use fewer scales or paths.")
+    final_log = np.empty((len(scales), n))
+    max_drawdown = np.empty((len(scales), n))
+    ruined = np.empty((len(scales), n), dtype=bool)
+    path_chunk = max(1, min(n, int(budget // (_FRONTIER_BYTES * L + 8))))
+    for start in range(0, n, path_chunk):
+        stop = min(start + path_chunk, n)
+        wins, losses = outcome_counts(rng, stop - start, L, p_up, p_down)
+        rows = np.arange(stop - start)
+        for k in range(len(scales)):
+            # a whole-wealth stake (f = 1) is wiped out by its first loss; 0 losses * ln(0) would be nan
+            loss_term = losses * down[k] if f[k] < 1 else np.where(losses > 0, -np.inf, 0.0)
+            log_wealth = log_start + wins * up[k] + loss_term
+            hit = log_wealth <= log_threshold
+            went_bankrupt = hit.any(axis=1)
+            last = np.where(went_bankrupt, hit.argmax(axis=1), L - 1)
+            final = log_wealth[rows, last]
+            # freeze each ruined path at its ruin wealth
+            log_wealth = np.where(np.arange(L) > last[:, None], final[:, None], log_wealth)
+            peak = np.maximum(np.maximum.accumulate(log_wealth, axis=1), log_start)
+            final_log[k, start:stop] = final
+            max_drawdown[k, start:stop] = 1 - np.exp((log_wealth - peak).min(axis=1))
+            ruined[k, start:stop] = went_bankrupt
+
+    growth = (final_log - log_start) / L
+    with np.errstate(invalid='ignore'):
+        theory = np.where(f == 0, 0.0, p_up * up + p_down * down)
+    return {
+        'scale': scales,
+        'f_scaled': f,
+        'mean_log_growth': growth.mean(axis=1),
+        'median_log_growth': np.median(growth, axis=1),
+        'theory_log_growth': theory,
+        'ruin_probability': ruined.mean(axis=1),
+        'drawdown_quantiles': np.quantile(max_drawdown, quantiles, axis=1).T,
+        'quantiles': np.asarray(quantiles, dtype=float),
+    }
+
+
+def print_frontier(frontier, rows=11):
+
+    picks = np.unique(np.linspace(0, len(frontier['scale']) - 1, rows).round().astype(int))
+    labels = ''.join(f"{'DD q' + format(q, 'g'):>10}" for q in frontier['quantiles'])
+    print("\n=== Kelly Frontier ===")
+    print(f"{'scale':>7}{'f_scaled':>10}{'mean g':>13}{'median g':>13}{'theory g':>13}{'ruin':>8}{labels}")
+    for i in picks:
+        drawdowns = ''.join(f"{d:>10.3f}" for d in frontier['drawdown_quantiles'][i])
+        print(f"{frontier['scale'][i]:>7.3f}{frontier['f_scaled'][i]:>10.4f}{frontier['mean_log_growth'][i]:>13.3e}"
+              f"{frontier['median_log_growth'][i]:>13.3e}{frontier['theory_log_growth'][i]:>13.3e}"
+              f"{frontier['ruin_probability'][i]:>8.3f}{drawdowns}")
+    print()
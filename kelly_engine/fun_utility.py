@@ -0,0 +1,123 @@
+import numpy as np
+
+from .optimal import _optimal_fraction
+
+
+def _marginal_utility(f, p, b, g, k, alpha):
+    # first and second derivative of the fun-utility objective in f, divided by W**(1 - g)
+    win = 1 + f * b
+    lose = 1 - f
+    fun = 1 + alpha * f * b
+    q = 1 - p
+    d1 = p * b * win ** -g - np.where(q > 0, q * lose ** -g, 0.0) + k * alpha * b / fun
+    d2 = -g * p * b**2 * win ** (-g - 1) - np.where(q > 0, g * q * lose ** (-g - 1), 0.0) - k * (alpha * b)**2 / fun**2
+    return d1, d2
+
+
+def _expected_utility(f, p, b, g, k, alpha):
+    # objective divided by W**(1 - g); only used to rank candidates when it isn't concave
+    win = 1 + f * b
+    lose = 1 - f
+    log_g = g == 1
+    e = np.where(log_g, 1.0, 1 - g)
+    wealth = np.where(
+        log_g,
+        p * np.log(win) + (1 - p) * np.log(lose),
+        (p * win**e + (1 - p) * lose**e) / e,
+    )
+    return wealth + k * np.log(1 + alpha * f * b)
+
+
+def _coarse_guess(solve, arrays, shape, stride):
+    # solve every stride-th grid point and hand each point its nearest coarse solution
+    sub = tuple(slice(None, None, stride) for _ in shape)
+    coarse = solve(*(a[sub] for a in arrays), f0=None)
+    idx = np.ix_(*((np.arange(n) // stride) for n in shape))
+    return coarse[idx]
+
+
+def solve_fun_utility_fraction(p, b, g, c, alpha, W, f0=None, warm_start=True, tol=1e-12, max_iter=100):
+    """
+    Optimal fraction for CRRA utility plus the fun term c * log(1 + alpha * f * b), over arrays.
+
+    Solves the first-order condition
+        p*b*(1+f*b)**-g - (1-p)*(1-f)**-g + c*W**(g-1) * alpha*b / (1+alpha*f*b) = 0
+    on [0, 1] with a bracketed Newton iteration (bisection whenever a Newton step
+    leaves the bracket), so every grid point is solved in the same NumPy passes.
+
+    Parameters:
+    - p (array_like): Probability of winning used for sizing.
+    - b (array_like): Net odds (b to 1).
+    - g (array_like): Relative risk aversion coefficient (1 for log utility).
+    - c (array_like): Weight of the fun utility term.
+    - alpha (array_like): Fun sensitivity to the potential win.
+    - W (array_like): Wealth the fraction is evaluated at.
+    - f0 (array_like or None): Starting guess. Defaults to the closed-form c = 0 fraction.
+    - warm_start (bool): For grids, first solve a strided sub-grid and start every point
+      from its nearest solved neighbour.
+    - tol (float): Convergence tolerance on f.
+    - max_iter (int): Iteration cap per point.
+
+    Returns:
+    - f_star (ndarray): Optimal fraction in [0, 1], shape of the broadcast inputs (0-d for scalars).
+    """
+    arrays = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (p, b, g, c, alpha, W)))
+    shape = arrays[0].shape
+
+    def solve(p, b, g, c, alpha, W, f0):
+        return solve_fun_utility_fraction(p, b, g, c, alpha, W, f0=f0, warm_start=False, tol=tol, max_iter=max_iter)
+
+    stride = 8
+    if f0 is None and warm_start and len(shape) and min(shape) > stride:
+        f0 = _coarse_guess(solve, arrays, shape, stride)
+
+    if f0 is None:
+        f0 = _optimal_fraction(*arrays[:3])
+    f = np.clip(np.broadcast_to(np.asarray(f0, dtype=float), shape).ravel(), 0.0, 1.0)
+
+    p, b, g, c, alpha, W = (a.ravel() for a in arrays)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        k = c * W ** (g - 1)
+
+        lo = np.zeros_like(f)
+        hi = np.ones_like(f)
+        d_lo, _ = _marginal_utility(lo, p, b, g, k, alpha)
+        d_hi, _ = _marginal_utility(hi, p, b, g, k, alpha)
+
+        # corner solutions: never worth betting, or worth betting everything
+        f = np.where(d_lo <= 0, 0.0, np.where(d_hi >= 0, 1.0, f))
+        f = np.where(np.isnan(d_lo), 0.0, f)
+        todo = np.flatnonzero((d_lo > 0) & (d_hi < 0))
+
+        x = np.clip(f[todo], 1e-12, 1 - 1e-12)
+        lo_t, hi_t = lo[todo], hi[todo]
+        args = [a[todo] for a in (p, b, g, k, alpha)]
+        for _ in range(max_iter):
+            if todo.size == 0:
+                break
+            d1, d2 = _marginal_utility(x, *args)
+            # d1 is decreasing through the root, so its sign tells which side we're on
+            lo_t = np.where(d1 > 0, x, lo_t)
+            hi_t = np.where(d1 > 0, hi_t, x)
+            step = np.where(d1 == 0, 0.0, np.where(d2 < 0, -d1 / d2, np.nan))
+            x_new = x + step
+            bad = ~((x_new >= lo_t) & (x_new <= hi_t))
+            x_new = np.where(bad, 0.5 * (lo_t + hi_t), x_new)
+
+            done = (np.abs(x_new - x) <= tol) | (hi_t - lo_t <= tol)
+            f[todo] = x_new
+            keep = ~done
+            todo, x = todo[keep], x_new[keep]
+            lo_t, hi_t = lo_t[keep], hi_t[keep]
+            args = [a[keep] for a in args]
+
+        # risk-seeking rows aren't concave, so the stationary point may be a minimum
+        convex = (g < 0) | (k * alpha < 0)
+        if convex.any():
+            cand = np.stack([np.zeros(convex.sum()), f[convex], np.ones(convex.sum())])
+            rows = [a[convex] for a in (p, b, g, k, alpha)]
+            utils = _expected_utility(cand, *rows)
+            utils = np.where(np.isnan(utils), -np.inf, utils)
+            f[convex] = cand[np.argmax(utils, axis=0), np.arange(cand.shape[1])]
+
+    return f.reshape(shape)[()]
@@ -0,0 +1,64 @@
+import math
+
+import numpy as np
+
+from .engine import simulate_paths
+
+
+def _merge_moments(count, mean, m2, values):
+    # Chan et al. parallel update of (count, mean, sum of squared deviations) with a new batch
+    n = len(values)
+    if n == 0:
+        return count, mean, m2
+    batch_mean = values.mean()
+    batch_m2 = ((values - batch_mean) ** 2).sum()
+    total = count + n
+    delta = batch_mean - mean
+    return total, mean + delta * n / total, m2 + batch_m2 + delta**2 * count * n / total
+
+
+def iter_simulations(num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b,
+                     paths_per_snapshot=1000, policy=None, seed=None, outcome_memory=0, max_bytes=2e9):
+    """
+    Runs paths in batches of paths_per_snapshot and yields a running summary after each batch.
+
+    Each batch is a simulate_paths run with its own Generator, spawned in turn from one
+    SeedSequence, so the sequence of snapshots is reproducible for a given seed. Stop
+    iterating (or break out of the loop) to cancel; num_simulations=None runs until then.
+
+    Yields:
+    - snapshot (dict): 'paths' done so far, 'ruin_rate' and its standard error
+      'ruin_rate_se', and across paths the mean log-wealth ('mean_log_wealth',
+      'mean_log_wealth_se') and log growth per bet ('mean_log_growth', 'std_log_growth',
+      'mean_log_growth_se'), i.e. the per-path slope of log-wealth.
+    """
+    seed_sequence = np.random.SeedSequence(seed)
+    paths = 0
+    ruined = 0
+    log_wealth = (0, 0.0, 0.0)
+    growth = (0, 0.0, 0.0)
+
+    while num_simulations is None or paths < num_simulations:
+        n = paths_per_snapshot if num_simulations is None else min(paths_per_snapshot, num_simulations - paths)
+        results = simulate_paths(
+            n, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b, f_scaled=f_scaled, policy=policy,
+            seed=np.random.default_rng(seed_sequence.spawn(1)[0]), outcome_memory=outcome_memory, max_bytes=max_bytes,
+        )
+        paths += n
+        ruined += int(results['went_bankrupt'].sum())
+        log_wealth = _merge_moments(*log_wealth, results['mean_log_wealth'])
+        growth = _merge_moments(*growth, results['slope_log_wealth'])
+
+        ruin_rate = ruined / paths
+        log_wealth_var = log_wealth[2] / (paths - 1) if paths > 1 else math.nan
+        growth_var = growth[2] / (paths - 1) if paths > 1 else math.nan
+        yield {
+            'paths': paths,
+            'ruin_rate': ruin_rate,
+            'ruin_rate_se': math.sqrt(ruin_rate * (1 - ruin_rate) / paths),
+            'mean_log_wealth': float(log_wealth[1]),
+            'mean_log_wealth_se': math.sqrt(log_wealth_var / paths),
+            'mean_log_growth': float(growth[1]),
+            'std_log_growth': math.sqrt(growth_var),
+            'mean_log_growth_se': math.sqrt(growth_var / paths),
+        }
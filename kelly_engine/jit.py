@@ -0,0 +1,90 @@
+from importlib.util import find_spec
+
+import numpy as np
+
+from .engine import simulate_paths, log_wealth_statistics
+from .policy import interpolated_policy, drawdown_throttled_policy
+
+# numba is imported (and the kernels compiled or loaded from cache) on the first
+# compiled run, not when kelly_engine is imported
+HAVE_NUMBA = find_spec('numba') is not None
+
+
+def _compiled_kernel():
+    # kelly_engine.jit_kernels imports numba and defines the kernels at module level, so
+    # numba's on-disk cache finds them in a new process
+    from .jit_kernels import path_kernel
+
+    return path_kernel
+
+
+def simulate_paths_jit(num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b,
+                       f_scaled=None, wealth_table=None, max_drawdown=None, floor=0.0, seed=None, keep_histories=0):
+    """
+    Compiled per-path loop, equivalent to run_single_simulation, parallel over paths.
+
+    Each path runs bet by bet in machine code and stops on ruin, keeping wealth, peak,
+    min and the log-wealth regression sums in locals, so three-way outcomes and
+    state-dependent fractions cost the same as a constant one. Needs numba (kernels
+    are cached on disk after the first compile); without it the same strategy runs on
+    the NumPy engine (simulate_paths), with numpy's random stream instead.
+
+    Parameters:
+    - Same as simulate_paths, except the strategy is given as data rather than a callable:
+    - f_scaled (float): Fraction wagered each bet, used when wealth_table is None.
+    - wealth_table (tuple or None): (grid, fractions) from fun_utility_policy_table;
+      the fraction is interpolated in log-wealth as in interpolated_policy.
+    - max_drawdown, floor (float or None): Drawdown throttle applied on top of the
+      fraction, as in drawdown_throttled_policy.
+
+    Returns:
+    - results (dict): Same keys as simulate_paths.
+    """
+    if f_scaled is None and wealth_table is None:
+        raise ValueError("simulate_paths_jit needs a strategy: pass f_scaled or wealth_table.")
+    if not HAVE_NUMBA:
+        policy = interpolated_policy(*wealth_table) if wealth_table is not None else None
+        if max_drawdown:
+            base = policy
+            throttle = drawdown_throttled_policy(1.0, max_drawdown, floor)
+
+            def policy(state):
+                return (f_scaled if base is None else base(state)) * throttle(state)
+
+        return simulate_paths(num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b,
+                              f_scaled=f_scaled, policy=policy, seed=seed, keep_histories=keep_histories)
+
+    n = num_simulations
+    keep = min(keep_histories, n)
+    if wealth_table is not None:
+        log_grid, fractions = np.log(wealth_table[0]), np.asarray(wealth_table[1], dtype=float)
+        f_scaled = 0.0
+    else:
+        log_grid, fractions = np.empty(0), np.empty(0)
+
+    final_wealth = np.empty(n)
+    peak_wealth = np.empty(n)
+    min_wealth = np.empty(n)
+    went_bankrupt = np.empty(n, dtype=bool)
+    bet_count = np.empty(n, dtype=np.int64)
+    sums = np.empty((3, n))
+    history = np.empty((keep, upper_bet_limit + 1))
+    history[:, 0] = starting_wealth
+
+    path_seed = np.random.default_rng(seed).integers(2**63)
+    _compiled_kernel()(
+        path_seed, float(starting_wealth), p_up, p_down, upper_bet_limit, float(lower_threshold), float(b),
+        float(f_scaled), log_grid, fractions, float(max_drawdown or 0.0), float(floor),
+        final_wealth, peak_wealth, min_wealth, went_bankrupt, bet_count, sums, history,
+    )
+
+    results = {
+        'final_wealth': final_wealth,
+        'peak_wealth': peak_wealth,
+        'min_wealth': min_wealth,
+        'went_bankrupt': went_bankrupt,
+        'bet_count': bet_count,
+        'histories': [history[i, :bet_count[i] + 1] for i in range(keep)],
+    }
+    results.update(log_wealth_statistics(bet_count + 1, *sums, np.log(starting_wealth)))
+    return results
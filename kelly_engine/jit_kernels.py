@@ -0,0 +1,75 @@
+import numba
+import numpy as np
+
+# compiled kernels for kelly_engine.jit, which imports this module on the first compiled run
+# so that numba stays optional; module-level functions are what numba's disk cache can find
+
+
+@numba.njit(cache=True, inline='always')
+def uniform(state):
+    # splitmix64: one uniform in [0, 1) per call from a per-path 64-bit counter, so every
+    # path has its own stream and results don't depend on how prange schedules threads
+    state = state + np.uint64(0x9E3779B97F4A7C15)
+    z = state
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return state, (z >> np.uint64(11)) * (1.0 / 9007199254740992.0)
+
+
+@numba.njit(cache=True, parallel=True)
+def path_kernel(seed, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b, f_scaled,
+                log_grid, fractions, max_drawdown, floor, final_wealth, peak_wealth, min_wealth, went_bankrupt,
+                bet_count, sums, history):
+    # run_single_simulation for every path, one path per iteration, state kept in locals
+    log_start = np.log(starting_wealth)
+    keep = history.shape[0]
+    for i in numba.prange(final_wealth.shape[0]):
+        state = np.uint64(seed) + np.uint64(i) * np.uint64(0xD1B54A32D192ED03)
+        wealth = starting_wealth
+        peak = wealth
+        low = wealth
+        sum_d = 0.0
+        sum_dd = 0.0
+        sum_td = 0.0
+        count = 0
+        ruined = False
+
+        if wealth > lower_threshold:
+            for t in range(1, upper_bet_limit + 1):
+                state, outcome = uniform(state)
+                f = f_scaled
+                if log_grid.shape[0] > 0:
+                    f = np.interp(np.log(wealth), log_grid, fractions)
+                if max_drawdown > 0:
+                    f *= max(1.0 - (1.0 - wealth / peak) / max_drawdown, floor)
+
+                # calculate wager_amount as a fraction of current wealth
+                wager_amount = wealth * f
+                if outcome < p_up:
+                    wealth += wager_amount * b
+                elif outcome < p_up + p_down:
+                    wealth -= wager_amount
+
+                d = np.log(wealth) - log_start
+                sum_d += d
+                sum_dd += d * d
+                sum_td += t * d
+                count = t
+                peak = max(peak, wealth)
+                low = min(low, wealth)
+                if i < keep:
+                    history[i, t] = wealth
+
+                if wealth <= lower_threshold:
+                    ruined = True
+                    break
+
+        final_wealth[i] = wealth
+        peak_wealth[i] = peak
+        min_wealth[i] = low
+        went_bankrupt[i] = ruined
+        bet_count[i] = count
+        sums[0, i] = sum_d
+        sums[1, i] = sum_dd
+        sums[2, i] = sum_td
@@ -0,0 +1,147 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+# memo of recently evaluated strategy grids, keyed on the raw input arrays
+_FRACTION_CACHE = OrderedDict()
+_FRACTION_CACHE_SIZE = 32
+
+
+def _grid_key(*arrays):
+    # hash the buffers instead of storing them so big grids don't pin memory in the cache
+    key = []
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        key.append((a.dtype.str, a.shape, hashlib.blake2b(a, digest_size=16).digest()))
+    return tuple(key)
+
+
+def _cached(key):
+    if key in _FRACTION_CACHE:
+        _FRACTION_CACHE.move_to_end(key)
+        return _FRACTION_CACHE[key]
+    return None
+
+
+def _store(key, value):
+    value.flags.writeable = False   # shared between callers, so freeze it
+    _FRACTION_CACHE[key] = value
+    if len(_FRACTION_CACHE) > _FRACTION_CACHE_SIZE:
+        _FRACTION_CACHE.popitem(last=False)
+    return value
+
+
+def clear_fraction_cache():
+    _FRACTION_CACHE.clear()
+
+
+def _optimal_fraction(p, b, g):
+    p, b, g = np.broadcast_arrays(p, b, g)
+    q = 1 - p
+    neutral = g == 0
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # risk-neutral case: maximize expected value
+        f_neutral = (p * b - q) / b
+        # CRRA case
+        ratio = (p * b) / q
+        root = ratio ** (1 / np.where(neutral, 1.0, g))
+        f_crra = (root - 1) / (b + root)
+    f_star = np.where(neutral, f_neutral, np.where(q == 0, 0.0, f_crra))
+    f_star[~np.isfinite(f_star)] = 0.0
+    return f_star
+
+
+def compute_optimal_fraction(p, b, g):
+    """
+    Generalized (CRRA) Kelly fraction evaluated element-wise over broadcast arrays.
+
+    Matches the scalar compute_optimal_fraction in the scripts: g == 0 gives the
+    risk-neutral fraction and anything the closed form can't evaluate (p = 1,
+    b = 0, 0**(1/g) with g < 0, negative ratios) gives 0 instead of raising.
+
+    Parameters:
+    - p (array_like): Probability of winning used for sizing (perceived probability).
+    - b (array_like): Net odds (b to 1).
+    - g (array_like): Relative risk aversion coefficient (1 for Kelly).
+
+    Returns:
+    - f_star (ndarray): Optimal fraction, shape of the broadcast inputs (0-d for scalars).
+    """
+    p, b, g = (np.asarray(x, dtype=float) for x in (p, b, g))
+    key = ('f_star',) + _grid_key(p, b, g)
+    hit = _cached(key)
+    if hit is not None:
+        return hit[()]
+    return _store(key, _optimal_fraction(p, b, g))[()]
+
+
+def compute_scaled_fraction(p, b, g, scale=1.0, clip=True):
+    """
+    Scaled generalized Kelly fraction over whole (p, b, g, scale) grids in one call.
+
+    Parameters:
+    - p, b, g (array_like): As in compute_optimal_fraction.
+    - scale (array_like): Scaling factor (1 for full Kelly, 0.5 for half-Kelly).
+    - clip (bool): Clamp the result to [0, 1] like the scripts do before simulating.
+
+    Returns:
+    - f_scaled (ndarray): Scaled fraction, shape of the broadcast inputs (0-d for scalars).
+    """
+    p, b, g, scale = (np.asarray(x, dtype=float) for x in (p, b, g, scale))
+    key = ('f_scaled', bool(clip)) + _grid_key(p, b, g, scale)
+    hit = _cached(key)
+    if hit is not None:
+        return hit[()]
+
+    f_scaled = _optimal_fraction(p, b, g) * scale
+    if clip:
+        f_scaled = np.clip(f_scaled, 0.0, 1.0)
+    f_scaled = np.asarray(f_scaled)
+
+    return _store(key, f_scaled)[()]
+
+
+def prelec_weight(p, alpha):
+    """
+    Prelec probability weighting exp(-(-ln p)**alpha), element-wise over broadcast arrays.
+
+    alpha = 1 leaves p unchanged; alpha < 1 overweights small probabilities, which is how
+    the misperceived-odds script turns the actual win probability into the perceived one.
+    """
+    p, alpha = (np.asarray(x, dtype=float) for x in (p, alpha))
+    with np.errstate(divide='ignore'):
+        return np.exp(-((-np.log(p)) ** alpha))[()]
+
+
+def break_even_alpha(p_actual, b, g=1.0, f_min=0.0):
+    """
+    Critical Prelec alpha at which the perceived-probability Kelly fraction reaches f_min.
+
+    The fraction is compute_optimal_fraction(prelec_weight(p_actual, alpha), b, g), so
+    the answer is closed form: invert the fraction for the perceived probability p*
+    that gives f_min (p* = 1 / (1 + b) for f_min = 0 and any g > 0, so g drops out of the
+    break-even point), then solve exp(-(-ln p)**alpha) = p* for alpha. Evaluated
+    element-wise over broadcast arrays, so a million-point boundary surface takes
+    milliseconds. For American roulette (p = 1/38, b = 35) this gives 0.98841.
+
+    Prelec weighting pivots on p = 1/e: below it, any alpha under the critical value
+    overweights the win probability enough to bet; above it, any alpha over it does.
+
+    Parameters:
+    - p_actual (array_like): Actual probability of winning.
+    - b (array_like): Net odds (b to 1).
+    - g (array_like): Relative risk aversion coefficient (g = 0 is risk-neutral).
+    - f_min (array_like): Fraction to reach; 0 is the point where betting starts.
+
+    Returns:
+    - alpha (ndarray): Critical alpha, nan where none exists (p_actual = 1/e, or a
+      target p* outside (0, 1)). Shape of the broadcast inputs (0-d for scalars).
+    """
+    p, b, g, f_min = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (p_actual, b, g, f_min)))
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # perceived probability whose fraction is f_min
+        ratio = ((1 + b * f_min) / (1 - f_min)) ** np.where(g == 0, 1.0, g)
+        p_target = np.where(g == 0, (f_min * b + 1) / (b + 1), ratio / (b + ratio))
+        alpha = np.log(-np.log(p_target)) / np.log(-np.log(p))
+    return np.where(np.isfinite(alpha) & (alpha > 0), alpha, np.nan)[()]
@@ -0,0 +1,237 @@
+import math
+
+import numpy as np
+
+from .frontier import outcome_counts
+
+
+def _evaluate(f, wins, losses, b, log_start, log_threshold, objective, smoothing):
+    """
+    One pass over the shared outcomes at fraction f: objective and smoothed ruin, each with
+    pathwise first and second derivatives in f.
+
+    A path's log-wealth after t bets is ln W0 + wins_t ln(1 + f b) + losses_t ln(1 - f),
+    so its derivatives are wins_t b / (1 + f b) - losses_t / (1 - f) and so on. Ruin
+    (a step in f) is replaced by sigmoid(-margin / smoothing), where margin is the
+    path's lowest log-wealth above ln(lower_threshold); the lowest point is locally
+    fixed, so its derivative is the path's derivative at that bet. The same smoothed ruin
+    carries the jump in the mean objective when a path tips into ruin.
+    """
+    n, L = wins.shape
+    rows = np.arange(n)
+    up, down = math.log1p(f * b), math.log1p(-f)
+    du, dd = b / (1 + f * b), -1 / (1 - f)
+    d2u, d2d = -du**2, -dd**2
+
+    log_wealth = log_start + wins * up + losses * down
+    hit = log_wealth <= log_threshold
+    ruined = hit.any(axis=1)
+    # the scripts stop at ruin, so a ruined path's final wealth is its wealth on that bet
+    last = np.where(ruined, hit.argmax(axis=1), L - 1)
+    w, l = wins[rows, last], losses[rows, last]
+    final = log_start + w * up + l * down
+    d1, d2 = w * du + l * dd, w * d2u + l * d2d
+
+    lowest = log_wealth.argmin(axis=1)
+    low = log_wealth[rows, lowest]
+    start_is_lowest = low >= log_start
+    margin = np.minimum(low, log_start) - log_threshold
+    w, l = wins[rows, lowest], losses[rows, lowest]
+    m1 = np.where(start_is_lowest, 0.0, w * du + l * dd)
+    m2 = np.where(start_is_lowest, 0.0, w * d2u + l * d2d)
+    s = 1 / (1 + np.exp(np.clip(margin / smoothing, -700, 700)))
+    ds = s * (1 - s)
+    s1 = -ds * m1 / smoothing
+    s2 = ds * (1 - 2 * s) * (m1 / smoothing) ** 2 - ds * m2 / smoothing
+
+    if objective == 'median':
+        # a quantile moves with the paths around it (their derivatives averaged over a band of
+        # ranks), and drops as paths above it tip into ruin (their smoothed flux over the density)
+        order = np.argsort(final)
+        half = max(1, int(math.sqrt(n)) // 2)
+        band = order[max(0, n // 2 - half):n // 2 + half + 1]
+        value = float(np.median(final))
+        width = final[band[-1]] - final[band[0]]
+        density = len(band) / n / width if width > 0 else np.inf
+        flux = float((s1 * (log_wealth[:, -1] > value)).mean())
+        grad = float(d1[band].mean()) - flux / density
+        hess = float(d2[band].mean())
+    elif objective == 'mean':
+        # stopping makes the mean jump as paths tip into ruin, which pathwise derivatives of the
+        # stopped paths miss; differentiate (1 - s) * unstopped final + s * ln(lower_threshold) instead
+        unstopped = log_wealth[:, -1]
+        u1 = wins[:, -1] * du + losses[:, -1] * dd
+        u2 = wins[:, -1] * d2u + losses[:, -1] * d2d
+        gap = unstopped - log_threshold
+        value = float(final.mean())
+        grad = float(((1 - s) * u1 - s1 * gap).mean())
+        hess = float(((1 - s) * u2 - 2 * s1 * u1 - s2 * gap).mean())
+    else:
+        raise ValueError(f"Unknown objective {objective!r}; use 'median' or 'mean'.")
+
+    return {
+        'value': value, 'grad': grad, 'hess': hess,
+        'ruin': float(s.mean()), 'ruin_grad': float(s1.mean()),
+        'ruin_probability': float(ruined.mean()),
+    }
+
+
+def _safeguarded_newton(step, lo, hi, x, tol, max_iter):
+    # Newton on a root bracketed by [lo, hi]: step(x) returns (residual, slope, sign at x
+    # relative to the root: +1 above it); bisect whenever Newton would leave the bracket
+    for _ in range(max_iter):
+        residual, slope, side = step(x)
+        if side > 0:
+            hi = x
+        else:
+            lo = x
+        candidate = x - residual / slope if slope != 0 else np.nan
+        if not lo < candidate < hi:
+            candidate = 0.5 * (lo + hi)
+        if abs(candidate - x) < tol or hi - lo < tol:
+            return candidate
+        x = candidate
+    return x
+
+
+def _grid_then_golden(value, x, lo, hi, tol, points=33):
+    """
+    Maximizes value(f) on [lo, hi] by a grid, then golden-section search between the best
+    grid point's neighbours; returns whichever of that and x is higher.
+
+    For objectives whose pathwise derivatives are only approximate (a sample median has
+    none of its own), so that Newton can stop short of the maximum.
+    """
+    grid = np.linspace(lo, hi, points)
+    values = [value(f) for f in grid]
+    i = int(np.argmax(values))
+    a, b = grid[max(i - 1, 0)], grid[min(i + 1, points - 1)]
+    ratio = (math.sqrt(5) - 1) / 2
+    c, d = b - ratio * (b - a), a + ratio * (b - a)
+    fc, fd = value(c), value(d)
+    while b - a > tol:
+        if fc >= fd:
+            b, d, fd = d, c, fc
+            c = b - ratio * (b - a)
+            fc = value(c)
+        else:
+            a, c, fc = c, d, fd
+            d = a + ratio * (b - a)
+            fd = value(d)
+    candidates = [(value(x), x), (values[i], grid[i]), (fc, c) if fc >= fd else (fd, d)]
+    return max(candidates)[1]
+
+
+def optimize_fraction(num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b, f_star,
+                      objective='median', max_ruin=0.01, p_perceived=None, smoothing=0.05, seed=None, tol=1e-6,
+                      max_iter=30):
+    """
+    Constant fraction that maximizes a simulated objective subject to a ruin limit, by
+    safeguarded Newton steps on pathwise derivatives over one shared outcome stream.
+
+    Outcomes are drawn once (common random numbers). Every step is one batched pass that
+    returns the objective and its first and second derivatives in f from each path's
+    log-wealth, which is smooth in f. The ruin limit is handled first: Newton on the
+    smoothed ruin probability finds the largest f whose ruin is at most max_ruin; the
+    objective is then maximized on [0, that f], never past the fraction whose expected
+    log growth is zero (about twice Kelly). The mean, ruin limit included, takes 5-20
+    passes. The median's derivatives are only approximated and can leave Newton short of
+    its maximum, so the median falls back on a grid: Newton's result is checked against a
+    33-point grid of the sample median on the same outcomes, and the best grid point is
+    refined by golden-section search. That costs about 55-75 passes in all.
+    The smoothed ruin can sit just under max_ruin where the paths' own ruin rate is just
+    over it; the result is then stepped back, by bisection on the unsmoothed ruin, to the
+    largest f that meets the limit on these paths.
+
+    For a constant fraction, scale and g only act through f = f*(p, b, g) * scale, so
+    the optimum is reported both ways: as the scale at the given f_star, and as the
+    risk aversion g that gives it at scale 1.
+
+    Parameters:
+    - num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b:
+      As in simulate_paths.
+    - f_star (float): Unscaled optimal fraction the scale refers to.
+    - objective (str): 'median' (median final log-wealth, i.e. median final wealth) or
+      'mean' (mean final log-wealth, the finite-horizon Kelly criterion).
+    - max_ruin (float or None): Largest ruin probability within upper_bet_limit bets.
+    - p_perceived (float): Probability f_star was sized on (default p_up), for 'g_equivalent'.
+    - smoothing (float): Width, in log-wealth, of the sigmoid standing in for the ruin step.
+    - seed, tol, max_iter: Outcome stream seed, tolerance on f and Newton steps per solve.
+
+    Returns:
+    - optimum (dict): 'f_scaled', 'scale' (f_scaled / f_star), 'g_equivalent',
+      'median_final_wealth' or 'mean_log_growth' (per bet), 'ruin_probability'
+      (unsmoothed, on the same paths, at most max_ruin), 'ruin_limited_f' (largest f
+      meeting max_ruin)
+      and 'passes' (batched evaluations used).
+    """
+    rng = np.random.default_rng(seed)
+    wins, losses = outcome_counts(rng, num_simulations, upper_bet_limit, p_up, p_down)
+    log_start, log_threshold = math.log(starting_wealth), math.log(lower_threshold)
+    passes = 0
+
+    def evaluate(f):
+        nonlocal passes
+        passes += 1
+        return _evaluate(f, wins, losses, b, log_start, log_threshold, objective, smoothing)
+
+    # past the fraction where expected log growth turns negative, neither objective improves:
+    # search [0, that fraction], cut down to the ruin limit
+    kelly = (p_up * b - p_down) / b
+    if kelly <= 0:
+        f_top = 0.0
+    else:
+        lo, hi = kelly, 1.0
+        while hi - lo > tol:
+            mid = 0.5 * (lo + hi)
+            lo, hi = (mid, hi) if p_up * math.log1p(mid * b) + p_down * math.log1p(-mid) > 0 else (lo, mid)
+        f_top = lo
+    if max_ruin is not None and f_top > 0:
+        def ruin_step(f):
+            e = evaluate(f)
+            return e['ruin'] - max_ruin, e['ruin_grad'], np.sign(e['ruin'] - max_ruin)
+
+        if ruin_step(f_top)[0] > 0:
+            f_top = _safeguarded_newton(ruin_step, 0.0, f_top, min(max(f_star, 1e-6), f_top / 2), tol, max_iter)
+
+    def objective_step(f):
+        e = evaluate(f)
+        return e['grad'], e['hess'], -np.sign(e['grad'])
+
+    if f_top == 0 or evaluate(f_top)['grad'] >= 0:
+        f_opt = f_top
+    elif evaluate(0.0)['grad'] <= 0:
+        f_opt = 0.0
+    else:
+        f_opt = _safeguarded_newton(objective_step, 0.0, f_top, min(max(f_star, 1e-6), f_top / 2), tol, max_iter)
+    if objective == 'median' and f_top > 0:
+        def median(f):
+            return evaluate(f)['value']
+
+        f_opt = _grid_then_golden(median, f_opt, 0.0, f_top, tol)
+
+    final = evaluate(f_opt)
+    if max_ruin is not None and final['ruin_probability'] > max_ruin:
+        lo, hi = 0.0, f_opt
+        while hi - lo > tol:
+            mid = 0.5 * (lo + hi)
+            lo, hi = (mid, hi) if evaluate(mid)['ruin_probability'] <= max_ruin else (lo, mid)
+        f_opt = f_top = lo
+        final = evaluate(f_opt)
+    p = p_up if p_perceived is None else p_perceived
+    ratio = p * b / (1 - p)
+    growth_ratio = (1 + b * f_opt) / (1 - f_opt)
+    optimum = {
+        'f_scaled': f_opt,
+        'scale': f_opt / f_star if f_star > 0 else np.nan,
+        'g_equivalent': math.log(ratio) / math.log(growth_ratio) if f_opt > 0 and ratio > 1 else np.nan,
+        'ruin_probability': final['ruin_probability'],
+        'ruin_limited_f': f_top,
+        'passes': passes,
+    }
+    if objective == 'median':
+        with np.errstate(over='ignore'):
+            optimum['median_final_wealth'] = float(np.exp(final['value']))
+    else:
+        optimum['mean_log_growth'] = (final['value'] - log_start) / upper_bet_limit
+    return optimum
@@ -0,0 +1,99 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+
+from .engine import simulate_paths
+
+
+def _blocks(num_simulations, workers):
+    # contiguous, near-equal ranges of paths, one per worker
+    edges = np.linspace(0, num_simulations, workers + 1).astype(int)
+    return [(start, stop) for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+
+
+def merge_results(parts):
+    """
+    Concatenates per-block results from simulate_paths, in path order.
+
+    Per-path arrays are joined end to end and the kept histories follow the same order,
+    so the merged dict looks like a single simulate_paths run over all paths.
+    """
+    merged = {key: np.concatenate([part[key] for part in parts]) for key in parts[0] if key != 'histories'}
+    merged['histories'] = [history for part in parts for history in part['histories']]
+    return merged
+
+
+def simulate_paths_parallel(num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b,
+                            f_scaled=None, policy=None, seed=None, keep_histories=0, outcome_memory=0,
+                            max_bytes=2e9, workers=None, backend='thread'):
+    """
+    Runs simulate_paths on blocks of paths in a thread or process pool and merges the results.
+
+    Each block gets its own Generator, spawned from one SeedSequence, so a run is
+    reproducible for a given seed and number of workers whichever backend runs it.
+    With threads the blocks share memory and run in parallel while NumPy's ufuncs and
+    the Generator hold no GIL; with processes each block pays for a fork and for
+    pickling its results back, and policy must be picklable (a module-level function,
+    not a closure such as interpolated_policy).
+
+    Parameters:
+    - Same as simulate_paths, plus:
+    - workers (int or None): Number of blocks / pool workers (default os.cpu_count()).
+    - backend (str): "thread" or "process".
+
+    Returns:
+    - results (dict): Same keys as simulate_paths, over all paths.
+    """
+    if backend not in ('thread', 'process'):
+        raise ValueError(f"backend must be 'thread' or 'process', got {backend!r}.")
+    workers = workers or os.cpu_count() or 1
+    blocks = _blocks(num_simulations, workers)
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+
+    pool_type = ThreadPoolExecutor if backend == 'thread' else ProcessPoolExecutor
+    with pool_type(max_workers=len(blocks)) as pool:
+        futures = [
+            pool.submit(
+                simulate_paths, stop - start, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b,
+                f_scaled=f_scaled, policy=policy, seed=np.random.default_rng(block_seed),
+                keep_histories=min(max(keep_histories - start, 0), stop - start),
+                outcome_memory=outcome_memory, max_bytes=max_bytes / len(blocks),
+            )
+            for (start, stop), block_seed in zip(blocks, seeds)
+        ]
+        parts = [future.result() for future in futures]
+    return merge_results(parts)
+
+
+def benchmark_backends(num_simulations=100000, upper_bet_limit=1000, workers=None, repeats=3):
+    """
+    Times the thread and process backends (and a single block) on the same Kelly run.
+
+    Returns:
+    - timings (dict): Best wall-clock seconds over `repeats` runs for 'single',
+      'thread' and 'process'.
+    """
+    args = (num_simulations, 1000, 0.5, 0.5, upper_bet_limit, 250, 1.1)
+    runs = {
+        'single': lambda: simulate_paths(*args, f_scaled=0.0455, seed=0),
+        'thread': lambda: simulate_paths_parallel(*args, f_scaled=0.0455, seed=0, workers=workers, backend='thread'),
+        'process': lambda: simulate_paths_parallel(*args, f_scaled=0.0455, seed=0, workers=workers, backend='process'),
+    }
+    timings = {}
+    for name, run in runs.items():
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+    return timings
+
+
+if __name__ == "__main__":
+    workers = os.cpu_count() or 1
+    print(f"=== Backend Benchmark ({workers} workers) ===")
+    for name, seconds in benchmark_backends(workers=workers).items():
+        print(f"{name:>8}: {seconds:.3f}s")
@@ -0,0 +1,108 @@
+import numpy as np
+
+from .fun_utility import solve_fun_utility_fraction
+
+
+def wealth_grid(w_min, w_max, num_points=256):
+    # log-spaced, since the fun-utility fraction varies with W through W**(g - 1)
+    return np.geomspace(w_min, w_max, num_points)
+
+
+def fun_utility_policy_table(p, b, g, c, alpha, w_min, w_max, num_points=256, scale=1.0):
+    """
+    Precomputes the wealth-dependent fun-utility fraction f*(W) on a log-spaced wealth grid.
+
+    Parameters:
+    - p, b, g, c, alpha (float): As in solve_fun_utility_fraction.
+    - w_min, w_max (float): Wealth range covered by the grid (clamped outside it).
+    - num_points (int): Number of grid points.
+    - scale (float): Scaling factor applied to f*(W) (1 for full, 0.5 for half).
+
+    Returns:
+    - grid (ndarray): Wealth levels.
+    - fractions (ndarray): Scaled fraction at each wealth level, clamped to [0, 1].
+    """
+    grid = wealth_grid(w_min, w_max, num_points)
+    f_star = solve_fun_utility_fraction(p, b, g, c, alpha, grid)
+    return grid, np.clip(f_star * scale, 0.0, 1.0)
+
+
+def interpolated_policy(grid, fractions):
+    """
+    Turns a (wealth, fraction) table into a policy for simulate_paths.
+
+    The returned policy interpolates linearly in log-wealth and holds the end values
+    outside the grid, so each step costs one np.interp over the batch.
+    """
+    log_grid = np.log(grid)
+    fractions = np.asarray(fractions, dtype=float)
+
+    def policy(state):
+        with np.errstate(divide='ignore'):
+            return np.interp(np.log(state['wealth']), log_grid, fractions)
+
+    return policy
+
+
+def dynamic_policy(grid, table, upper_bet_limit):
+    """
+    Turns a (bets remaining, wealth) table from solve_dynamic_policy into a policy for simulate_paths.
+
+    Every path is at the same bet index on a given step, so each step reads a single row of
+    the table and interpolates it in log-wealth for the whole batch. upper_bet_limit may be
+    shorter than the horizon the table was solved for, not longer; a bet past it raises.
+    """
+    if not 1 <= upper_bet_limit <= len(table):
+        raise ValueError(f"The table covers 1 to {len(table)} bets remaining, not upper_bet_limit={upper_bet_limit}.")
+    log_grid = np.log(grid)
+
+    def policy(state):
+        # bet 1 has upper_bet_limit bets remaining, i.e. row upper_bet_limit - 1
+        remaining = upper_bet_limit - state['bet_index']
+        if remaining < 0:
+            raise ValueError(f"Bet {state['bet_index']} is past the policy's horizon of {upper_bet_limit} bets.")
+        row = table[remaining]
+        with np.errstate(divide='ignore'):
+            return np.interp(np.log(state['wealth']), log_grid, row)
+
+    return policy
+
+
+def drawdown_throttled_policy(f_scaled, max_drawdown, floor=0.0):
+    """
+    Bets f_scaled at a new peak and cuts the fraction linearly as the drawdown grows.
+
+    At drawdown x (1 - wealth / peak) the fraction is f_scaled * max(1 - x / max_drawdown, floor),
+    so a path max_drawdown below its peak bets only floor * f_scaled.
+    """
+    def policy(state):
+        return f_scaled * np.maximum(1.0 - state['drawdown'] / max_drawdown, floor)
+
+    return policy
+
+
+def time_decay_policy(f_scaled, upper_bet_limit, final_scale=0.0):
+    """
+    Scales f_scaled linearly from 1 on the first bet to final_scale on bet upper_bet_limit.
+
+    Every path is at the same bet index on a given step, so the fraction is one scalar per step.
+    """
+    def policy(state):
+        progress = (state['bet_index'] - 1) / max(upper_bet_limit - 1, 1)
+        return f_scaled * (1.0 + (final_scale - 1.0) * progress)
+
+    return policy
+
+
+def loss_streak_policy(f_scaled, cut=0.5):
+    """
+    Multiplies f_scaled by cut for every loss among the recent outcomes the engine keeps.
+
+    Run with outcome_memory set to the window to look back over, e.g. outcome_memory=5
+    halves the bet for each loss in the last five bets.
+    """
+    def policy(state):
+        losses = (state['recent_outcomes'] < 0).sum(axis=1)
+        return f_scaled * cut**losses
+
+    return policy
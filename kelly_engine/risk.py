@@ -0,0 +1,296 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+from .engine import simulate_paths
+
+
+def _log_sum_exp(x):
+    top = np.max(x)
+    if not np.isfinite(top):
+        return float(top)
+    return float(top + np.log(np.exp(x - top).sum()))
+
+
+def exact_final_wealth(starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b):
+    """
+    Exact distribution of final wealth for a constant fraction, stopping at ruin as the scripts do.
+
+    After w wins and l losses wealth is W0 (1 + f b)^w (1 - f)^l in any order, so only the
+    walk of (wins, losses) matters, not when the no-change bets fall. The walk of moves is
+    stepped once per move, with the probability of w wins among them as a vector over w;
+    after k moves every w below some edge is at or below lower_threshold, and that mass
+    is absorbed at its ruin wealth. A path makes its k-th move by bet upper_bet_limit with
+    probability P(Binomial(upper_bet_limit, p_up + p_down) >= k), and stops after exactly k
+    moves with P(... = k). That is O(upper_bet_limit²) work: 10000 bets take well under a
+    second, and nothing is rounded or sampled.
+
+    Parameters:
+    - Same as run_single_simulation in the Kelly scripts. A lower_threshold of 0 is no
+      barrier: only a whole-wealth stake (f_scaled >= 1) can reach it, on its first loss.
+
+    Returns:
+    - distribution (dict): 'log_wealth', 'final_wealth', 'probability' and 'went_bankrupt'
+      (one entry per reachable outcome, sorted by wealth; probabilities below the smallest
+      double are dropped) and 'ruin_probability'.
+    """
+    L = upper_bet_limit
+    log_start = math.log(starting_wealth)
+    moves = p_up + p_down
+    if f_scaled <= 0 or moves <= 0 or starting_wealth <= lower_threshold:
+        # no bet ever changes wealth (the engines don't bet at all from at or below the threshold)
+        return {
+            'log_wealth': np.array([log_start]),
+            'final_wealth': np.array([float(starting_wealth)]),
+            'probability': np.array([1.0]),
+            'went_bankrupt': np.array([False]),
+            'ruin_probability': 0.0,
+        }
+    up = math.log1p(f_scaled * b)
+    down = math.log1p(-f_scaled) if f_scaled < 1 else -math.inf
+    p_win = p_up / moves
+
+    # number of moves among L bets: P(exactly k) and P(at least k)
+    k = np.arange(L + 1)
+    if moves >= 1:
+        moves_pmf = (k == L).astype(float)
+    else:
+        log_choose = math.lgamma(L + 1) - np.array([math.lgamma(i + 1) + math.lgamma(L - i + 1) for i in range(L + 1)])
+        moves_pmf = np.exp(log_choose + k * math.log(moves) + (L - k) * math.log1p(-moves))
+    moves_sf = np.cumsum(moves_pmf[::-1])[::-1]
+
+    alive = np.zeros(L + 1)
+    alive[0] = 1.0
+    first = 0                  # alive[:first] has been absorbed
+    atoms_w, atoms_l, atoms_p, atoms_ruined = [np.array([0])], [np.array([0])], [moves_pmf[:1]], [np.array([False])]
+    for n in range(1, L + 1):
+        if moves_sf[n] == 0:
+            break
+        # one more move: a win takes w to w + 1, a loss leaves it (mass below `first` is gone)
+        alive[first + 1:n + 1] = alive[first + 1:n + 1] * (1 - p_win) + alive[first:n] * p_win
+        alive[first] *= 1 - p_win
+        if f_scaled >= 1:
+            # a whole-wealth stake is wiped out by any loss (ruin unless the threshold is below zero)
+            edge = n if lower_threshold >= 0 else first
+        elif lower_threshold > 0:
+            # at or below the threshold: w (up - down) <= ln(threshold / W0) - n down
+            edge = math.floor((math.log(lower_threshold) - log_start - n * down) / (up - down) + 1e-9) + 1
+        else:
+            edge = first       # no barrier: a partial stake never takes wealth to zero
+        edge = min(max(edge, first), n + 1)
+        if edge > first:
+            w = np.arange(first, edge)
+            atoms_w.append(w)
+            atoms_l.append(n - w)
+            atoms_p.append(alive[first:edge] * moves_sf[n])
+            atoms_ruined.append(np.ones(edge - first, dtype=bool))
+            alive[first:edge] = 0.0
+            first = edge
+        if moves_pmf[n] > 0:
+            w = np.arange(first, n + 1)
+            atoms_w.append(w)
+            atoms_l.append(n - w)
+            atoms_p.append(alive[first:n + 1] * moves_pmf[n])
+            atoms_ruined.append(np.zeros(n + 1 - first, dtype=bool))
+
+    w, l, probability, ruined = (np.concatenate(x) for x in (atoms_w, atoms_l, atoms_p, atoms_ruined))
+    keep = probability > 0
+    w, l, probability, ruined = w[keep], l[keep], probability[keep], ruined[keep]
+    # 0 losses * ln(0) would be nan at f = 1
+    with np.errstate(invalid='ignore'):
+        log_wealth = log_start + w * up + np.where(l > 0, l * down, 0.0)
+    order = np.argsort(log_wealth, kind='stable')
+    with np.errstate(over='ignore'):
+        final_wealth = np.exp(log_wealth[order])
+    return {
+        'log_wealth': log_wealth[order],
+        'final_wealth': final_wealth,
+        'probability': probability[order],
+        'went_bankrupt': ruined[order],
+        'ruin_probability': float(probability[ruined].sum()),
+    }
+
+
+def _certainty_equivalent(log_wealth, log_p, g):
+    """
+    CRRA certainty equivalent of a weighted distribution of log-wealth, with its relative
+    standard error when log_p are log(weight / n) of n importance-sampled paths.
+
+    The weights are not renormalized: under the tilt that suits g, weight * W^(1 - g) is
+    nearly the same on every path, and dividing by the sum of the weights would bring
+    their whole variance back.
+    """
+    theta = 1 - g
+    n = len(log_p)
+    if theta == 0:
+        if np.isneginf(log_wealth).any():
+            return 0.0, 0.0
+        terms = np.exp(log_p) * log_wealth
+        return math.exp(float(terms.sum())), float(np.std(n * terms)) / math.sqrt(n)
+    scaled = log_p + theta * log_wealth
+    log_moment = _log_sum_exp(scaled)
+    if not np.isfinite(log_moment):
+        # wealth 0 with positive probability: g > 1 makes the expected utility -inf
+        return 0.0, 0.0
+    relative = n * np.exp(scaled - log_moment)
+    return math.exp(log_moment / theta), float(np.std(relative)) / math.sqrt(n) / abs(theta)
+
+
+def _effective_sample_size(log_weight):
+    # Kish: (sum of weights)^2 / sum of squared weights
+    return math.exp(2 * _log_sum_exp(log_weight) - _log_sum_exp(2 * log_weight))
+
+
+def _tail(log_wealth, p, starting_wealth, levels):
+    # lower quantiles of final wealth and the mean below them, with the atom at the quantile split
+    order = np.argsort(log_wealth, kind='stable')
+    with np.errstate(over='ignore'):
+        wealth = np.exp(log_wealth[order])
+    p = p[order] / p.sum()
+    cumulative = np.cumsum(p)
+    quantile, tail_mean = [], []
+    for level in levels:
+        j = min(int(np.searchsorted(cumulative, level - 1e-12)), len(p) - 1)
+        below = cumulative[j - 1] if j > 0 else 0.0
+        quantile.append(wealth[j])
+        tail_mean.append((p[:j] @ wealth[:j] + (level - below) * wealth[j]) / level)
+    quantile, tail_mean = np.array(quantile), np.array(tail_mean)
+    return quantile, tail_mean, starting_wealth - quantile, starting_wealth - tail_mean
+
+
+def _tilted(p_up, p_down, f_scaled, b, theta):
+    # outcome probabilities proportional to p * (wealth multiplier)^theta at the reference fraction
+    f = min(f_scaled, 0.999)
+    p = np.array([p_up, p_down, max(1 - p_up - p_down, 0.0)])
+    with np.errstate(divide='ignore'):
+        log_q = np.log(p) + theta * np.array([math.log1p(f * b), math.log1p(-f), 0.0])
+    q = np.exp(log_q - log_q.max())
+    q /= q.sum()
+    return float(q[0]), float(q[1])
+
+
+def risk_profile(starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b, f_scaled=None, policy=None,
+                 g=(0.0, 0.5, 1.0, 2.0), levels=(0.01, 0.05, 0.1), num_simulations=10000, seed=None, outcome_memory=0,
+                 max_bytes=2e9):
+    """
+    CRRA certainty equivalents, VaR and CVaR of final wealth for one strategy.
+
+    The certainty equivalent at g is the sure wealth with the same expected CRRA utility,
+    (E[W^(1 - g)])^(1 / (1 - g)), or exp(E[ln W]) at g = 1; g = 0 is the mean. With b = 35
+    the mean is carried by rare huge wins, so sample averages of it (and of anything with
+    g < 1) need enormous runs, while the certainty equivalent each g optimizes is the
+    number to compare strategies by.
+
+    A constant fraction (policy None) uses exact_final_wealth, so every figure is exact.
+    A policy is simulated with simulate_paths under tilted outcome probabilities and the
+    paths reweighted by their likelihood ratios (importance sampling). For each g the
+    outcomes are drawn with probabilities proportional to p (wealth multiplier)^(1 - g) at
+    f_scaled: for a constant fraction that makes every path's weighted utility the same,
+    so the closer the policy stays to f_scaled the smaller the error. VaR and CVaR come
+    from one more batch tilted toward losses, centred on the smallest level's quantile.
+
+    Parameters:
+    - starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b: As in simulate_paths.
+    - f_scaled (float): The constant fraction, or with a policy the fraction it is built
+      around (None samples a policy without tilting).
+    - policy (callable): State-dependent strategy, as in simulate_paths.
+    - g (sequence of float): Risk aversions to report certainty equivalents for.
+    - levels (sequence of float): Tail probabilities for VaR and CVaR.
+    - num_simulations (int): Paths per sampled batch (one batch per distinct g, plus one).
+    - seed, outcome_memory, max_bytes: As in simulate_paths.
+
+    Returns:
+    - profile (dict): 'method' ('exact' or 'importance sampling'), 'g' and
+      'certainty_equivalent', 'levels', 'wealth_quantile' (the level quantile of final
+      wealth), 'tail_mean' (mean final wealth at or below it), 'value_at_risk' and
+      'conditional_value_at_risk' (starting_wealth minus those two: losses, negative for
+      gains), and 'ruin_probability'. Sampled profiles add 'certainty_equivalent_se' and
+      'effective_sample_size' (per g, and 'tail_effective_sample_size').
+    """
+    g = np.atleast_1d(np.asarray(g, dtype=float))
+    levels = np.atleast_1d(np.asarray(levels, dtype=float))
+
+    if policy is None:
+        exact = exact_final_wealth(starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b)
+        log_wealth, probability = exact['log_wealth'], exact['probability']
+        log_p = np.log(probability / probability.sum())
+        quantile, tail_mean, var, cvar = _tail(log_wealth, probability, starting_wealth, levels)
+        return {
+            'method': 'exact',
+            'g': g,
+            'certainty_equivalent': np.array([_certainty_equivalent(log_wealth, log_p, gi)[0] for gi in g]),
+            'levels': levels,
+            'wealth_quantile': quantile,
+            'tail_mean': tail_mean,
+            'value_at_risk': var,
+            'conditional_value_at_risk': cvar,
+            'ruin_probability': exact['ruin_probability'],
+        }
+
+    rng = np.random.default_rng(seed)
+
+    def sample(theta):
+        sampling = (p_up, p_down) if f_scaled is None else _tilted(p_up, p_down, f_scaled, b, theta)
+        results = simulate_paths(num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, b,
+                                 policy=policy, seed=rng, outcome_memory=outcome_memory, max_bytes=max_bytes,
+                                 sample_probabilities=sampling)
+        with np.errstate(divide='ignore'):
+            log_wealth = np.log(results['final_wealth'])
+        return log_wealth, results['log_weight'] - math.log(num_simulations), results['went_bankrupt']
+
+    batches = {}
+    certainty_equivalent, se, ess = [], [], []
+    for gi in g:
+        if gi not in batches:
+            batches[gi] = sample(1 - gi)
+        log_wealth, log_p, _ = batches[gi]
+        ce, relative_se = _certainty_equivalent(log_wealth, log_p, gi)
+        certainty_equivalent.append(ce)
+        se.append(ce * relative_se)
+        ess.append(_effective_sample_size(log_p))
+
+    # tilt toward losses so that the smallest level's quantile is near the sampling mean of log-wealth
+    theta = 0.0
+    if f_scaled is not None and f_scaled > 0:
+        f = min(f_scaled, 0.999)
+        up, down = math.log1p(f * b), math.log1p(-f)
+        mean = p_up * up + p_down * down
+        sd = math.sqrt(max(p_up * up**2 + p_down * down**2 - mean**2, 0.0))
+        if sd > 0:
+            theta = NormalDist().inv_cdf(levels.min()) / (sd * math.sqrt(upper_bet_limit))
+    log_wealth, log_p, went_bankrupt = sample(theta)
+    p = np.exp(log_p)
+    quantile, tail_mean, var, cvar = _tail(log_wealth, p, starting_wealth, levels)
+    return {
+        'method': 'importance sampling',
+        'g': g,
+        'certainty_equivalent': np.array(certainty_equivalent),
+        'certainty_equivalent_se': np.array(se),
+        'effective_sample_size': np.array(ess),
+        'levels': levels,
+        'wealth_quantile': quantile,
+        'tail_mean': tail_mean,
+        'value_at_risk': var,
+        'conditional_value_at_risk': cvar,
+        'ruin_probability': float(p[went_bankrupt].sum()),
+        'tail_effective_sample_size': _effective_sample_size(log_p),
+    }
+
+
+def print_risk_profile(profile):
+
+    print(f"\n=== Risk Profile of Final Wealth ({profile['method']}) ===")
+    for i, g in enumerate(profile['g']):
+        line = f"Certainty Equivalent (g = {g:g}): {profile['certainty_equivalent'][i]:.2f}"
+        if 'certainty_equivalent_se' in profile:
+            line += (f" ± {profile['certainty_equivalent_se'][i]:.2f}"
+                     f" (effective sample size {profile['effective_sample_size'][i]:.0f})")
+        print(line)
+    for i, level in enumerate(profile['levels']):
+        print(f"VaR {level:.0%}: {profile['value_at_risk'][i]:.2f} (final wealth {profile['wealth_quantile'][i]:.2f}), "
+              f"CVaR {level:.0%}: {profile['conditional_value_at_risk'][i]:.2f}")
+    if 'tail_effective_sample_size' in profile:
+        print(f"Effective Sample Size of the Tail Batch: {profile['tail_effective_sample_size']:.0f}")
+    print(f"Ruin Probability: {profile['ruin_probability'] * 100:.4f}%")
+    print()
@@ -0,0 +1,172 @@
+import random
+
+import numpy as np
+
+from .engine import log_wealth_statistics
+
+
+def _numpy_stream(state):
+    # Python's random and numpy's legacy RandomState are the same MT19937 generator and
+    # random.random() == random_sample() draw for draw, so the state can be handed over
+    _, internal, _ = state
+    stream = np.random.RandomState()
+    stream.set_state(('MT19937', np.array(internal[:-1], dtype=np.uint32), internal[-1]))
+    return stream
+
+
+def _python_state(state, draws):
+    # state of Python's random after `draws` calls to random.random() from `state`
+    stream = _numpy_stream(state)
+    for start in range(0, draws, 2**20):
+        stream.random_sample(min(2**20, draws - start))
+    _, key, pos, _, _ = stream.get_state()
+    return (state[0], tuple(int(x) for x in key) + (pos,), None)
+
+
+def _wealth_paths(outcomes, active, starting_wealth, p_up, p_down, f_scaled, b, loss_fraction):
+    # the legacy per-bet update, same operations in the same order, across a batch of paths
+    n, steps = outcomes.shape
+    history = np.empty((n, steps + 1))
+    history[:, 0] = starting_wealth
+    wealth = history[:, 0].copy()
+    for t in range(steps):
+        outcome = outcomes[:, t]
+        wager_amount = f_scaled * wealth
+        up_amount = wager_amount * b
+        down_amount = np.abs(wager_amount * loss_fraction)
+        new_wealth = np.where(
+            outcome < p_up,
+            wealth + up_amount,
+            np.where(outcome < p_up + p_down, wealth - down_amount, wealth),
+        )
+        wealth = np.where(active[:, t], new_wealth, wealth)
+        history[:, t + 1] = wealth
+    return history
+
+
+def simulate_stream_paths(num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b,
+                          loss_fraction=-1.0, random_state=random, block_paths=None):
+    """
+    Batched replacement for a per-bet loop driven by Python's `random`, bit-for-bit.
+
+    The per-bet loop draws random.random() once per bet, path after path, so path i's
+    outcomes start where path i - 1 stopped. The batch engine reads the same stream in
+    blocks: a log-wealth cumsum per path finds where each path stops (and so where the
+    next one starts), then the exact per-bet update runs across a block of paths at once.
+    If rounding ever puts the two on different sides of lower_threshold, the exact update
+    wins and the following paths are re-aligned. Python's random is left in the state the
+    loop would have left it in.
+
+    Parameters:
+    - num_simulations (int): Number of paths.
+    - starting_wealth (float): Initial wealth of every path.
+    - p_up, p_down (float): Win / loss probabilities (the rest is "no change").
+    - upper_bet_limit (int): Maximum number of bets per path.
+    - lower_threshold (float): Ruin threshold.
+    - f_scaled (float): Fraction of wealth wagered each bet.
+    - b (float): Net odds (b to 1).
+    - loss_fraction (float): Return on a loss as a fraction of the wager (-1 loses the wager).
+    - random_state: Module or random.Random instance whose stream is consumed.
+    - block_paths (int or None): Paths per exact-update block (default bounds it to ~4M values).
+
+    Returns:
+    - results (dict): Same keys as simulate_paths, with every path's history.
+    """
+    state = random_state.getstate()
+    stream = _numpy_stream(state)
+    L = upper_bet_limit
+    if block_paths is None:
+        block_paths = max(1, 2**22 // (L + 1))
+
+    # window over the stream: data[0] is draw number `offset`
+    window = {'data': np.empty(0), 'offset': 0}
+
+    def take(start, count):
+        # draws start .. start + count - 1, dropping anything before start
+        data, offset = window['data'], window['offset']
+        kept = data[start - offset:]
+        if len(kept) < count:
+            kept = np.concatenate([kept, stream.random_sample(count - len(kept))])
+        window['data'], window['offset'] = kept, start
+        return kept[:count]
+
+    log_start = np.log(starting_wealth)
+    log_threshold = np.log(lower_threshold) if lower_threshold > 0 else -np.inf
+    with np.errstate(divide='ignore'):
+        log_up = np.log(starting_wealth + f_scaled * starting_wealth * b) - log_start
+        log_down = np.log(starting_wealth - abs(f_scaled * starting_wealth * loss_fraction)) - log_start
+
+    def replay(outcomes, active):
+        return _wealth_paths(outcomes, active, starting_wealth, p_up, p_down, f_scaled, b, loss_fraction)
+
+    results = {key: np.empty(num_simulations) for key in ('final_wealth', 'peak_wealth', 'min_wealth')}
+    results['went_bankrupt'] = np.zeros(num_simulations, dtype=bool)
+    results['bet_count'] = np.zeros(num_simulations, dtype=np.int64)
+    results['histories'] = []
+    sums = np.zeros((3, num_simulations))
+
+    can_bet = starting_wealth > lower_threshold
+    position = 0
+    first = 0
+    while first < num_simulations:
+        last = min(first + block_paths, num_simulations)
+        n = last - first
+
+        # where each path stops, hence where the next one starts reading the stream:
+        # one log-wealth cumsum over everything this block could consume, then per path a
+        # search for the first bet that ends at or below the threshold
+        counts = np.zeros(n, dtype=np.int64)
+        starts = np.zeros(n, dtype=np.int64)
+        if can_bet:
+            draws = take(position, n * L)
+            steps = np.where(draws < p_up, log_up, np.where(draws < p_up + p_down, log_down, 0.0))
+            level = np.concatenate([[0.0], np.cumsum(steps)])
+            drop = log_threshold - log_start
+            pos = 0
+            for j in range(n):
+                starts[j] = pos
+                hit = level[pos + 1:pos + L + 1] <= level[pos] + drop
+                counts[j] = hit.argmax() + 1 if hit.any() else L
+                pos += counts[j]
+            outcomes = draws[starts[:, None] + np.arange(L)]
+        else:
+            outcomes = np.ones((n, L))
+
+        # the exact per-bet update for the whole block, one step at a time
+        active = np.arange(L) < counts[:, None]
+        history = replay(outcomes, active)
+
+        if can_bet:
+            # the exact ruin bet must match; if rounding disagrees, trust the exact update
+            # and restart the next block right after that path
+            hit = history[:, 1:] <= lower_threshold
+            exact = np.where(hit.any(axis=1), hit.argmax(axis=1) + 1, L)
+            mismatch = np.flatnonzero(exact != counts)
+            if mismatch.size:
+                j = mismatch[0]
+                history[j] = replay(outcomes[j:j + 1], np.ones((1, L), dtype=bool))[0]
+                ruin = history[j, 1:] <= lower_threshold
+                counts[j] = ruin.argmax() + 1 if ruin.any() else L
+                n, last = j + 1, first + j + 1
+                history, counts = history[:n], counts[:n]
+
+        placed = np.arange(L + 1) <= counts[:, None]
+        rows = np.arange(n)
+        final = history[rows, counts]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d = np.where(placed, np.log(history) - log_start, 0.0)
+        block = slice(first, last)
+        results['final_wealth'][block] = final
+        results['peak_wealth'][block] = np.where(placed, history, -np.inf).max(axis=1)
+        results['min_wealth'][block] = np.where(placed, history, np.inf).min(axis=1)
+        results['went_bankrupt'][block] = can_bet & (final <= lower_threshold)
+        results['bet_count'][block] = counts
+        sums[:, block] = d.sum(axis=1), (d * d).sum(axis=1), (d * np.arange(L + 1)).sum(axis=1)
+        results['histories'].extend(history[j, :counts[j] + 1] for j in range(n))
+
+        position += int(counts.sum())
+        first = last
+
+    random_state.setstate(_python_state(state, position))
+    results.update(log_wealth_statistics(results['bet_count'] + 1, *sums, log_start))
+    return results
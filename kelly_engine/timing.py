@@ -0,0 +1,59 @@
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+def phase_timer(track_memory=False):
+    """
+    Wall-clock timers (and optionally tracemalloc peaks) for the phases of a run.
+
+    Returns (phase, timings). Wrap each phase in `with phase("path simulation"):`;
+    entering a phase again (e.g. once per simulation inside a loop) adds to its time.
+    timings maps each phase name to {'seconds', 'calls'} and, with track_memory,
+    'peak_mb': the most memory a single call held on top of what was allocated when it
+    started. Memory phases shouldn't nest, since each one resets tracemalloc's peak.
+    track_memory starts tracemalloc (if it isn't running) for the rest of the process;
+    it slows allocation-heavy Python loops noticeably.
+    """
+    timings = {}
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    @contextmanager
+    def phase(name):
+        if track_memory:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = timings.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            entry['seconds'] += time.perf_counter() - start
+            entry['calls'] += 1
+            if track_memory:
+                peak_mb = (tracemalloc.get_traced_memory()[1] - base) / 1e6
+                entry['peak_mb'] = max(entry.get('peak_mb', 0.0), peak_mb)
+
+    return phase, timings
+
+
+def untimed(name):
+    # stand-in for phase() when nothing is being timed
+    return nullcontext()
+
+
+def print_timings(timings):
+
+    total = sum(entry['seconds'] for entry in timings.values())
+    print("\n=== Phase Timings ===")
+    for name, entry in timings.items():
+        share = entry['seconds'] / total * 100 if total > 0 else 0.0
+        line = f"{name}: {entry['seconds']:.4f}s ({share:.1f}%)"
+        if entry['calls'] > 1:
+            line += f" over {entry['calls']} calls"
+        if 'peak_mb' in entry:
+            line += f", peak {entry['peak_mb']:.2f} MB"
+        print(line)
+    print(f"Total Timed: {total:.4f}s")
+    print()
@@ -0,0 +1,337 @@
+import argparse
+import contextlib
+import io
+import math
+import random
+import tracemalloc
+
+import numpy as np
+
+from .configs import FIXED_V2, NO_MISPERCEPTION, MISPERCEPTION, load_script
+from .drawdown import exact_drawdown, sample_drawdown
+from .engine import simulate_paths
+from .fixed import simulate_fixed_paths, exact_gamblers_ruin
+from .frontier import kelly_frontier
+from .jit import HAVE_NUMBA, simulate_paths_jit
+from .optimal import compute_scaled_fraction
+from .optimize import optimize_fraction
+from .parallel import simulate_paths_parallel
+from .policy import loss_streak_policy
+
+
+def ks_two_sample(a, b):
+    """
+    Two-sample Kolmogorov-Smirnov statistic and asymptotic p-value.
+
+    The p-value uses the Kolmogorov series with the usual small-sample correction
+    (en + 0.12 + 0.11 / en); with ties (discrete wealth levels) it is conservative.
+    """
+    a, b = np.sort(a), np.sort(b)
+    values = np.concatenate([a, b])
+    d = np.abs(np.searchsorted(a, values, side='right') / len(a) - np.searchsorted(b, values, side='right') / len(b)).max()
+    en = math.sqrt(len(a) * len(b) / (len(a) + len(b)))
+    lam = (en + 0.12 + 0.11 / en) * d
+    if lam < 1e-3:
+        return d, 1.0
+    k = np.arange(1, 101)
+    p = 2 * np.sum((-1) ** (k - 1) * np.exp(-2 * k**2 * lam**2))
+    return d, float(min(max(p, 0.0), 1.0))
+
+
+def _chi_square_sf(x, df):
+    # Wilson-Hilferty normal approximation to the chi-square upper tail
+    if df <= 0:
+        return 1.0
+    z = ((x / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def chi_square_counts(observed, expected_probabilities, min_expected=5):
+    """
+    Chi-square goodness of fit of observed counts to probabilities, pooling sparse bins.
+
+    Neighbouring bins (in the given order) are pooled until each holds at least
+    min_expected expected counts. Returns (statistic, p-value).
+    """
+    observed = np.asarray(observed, dtype=float)
+    expected = np.asarray(expected_probabilities, dtype=float) * observed.sum()
+    pooled_observed, pooled_expected = [], []
+    o = e = 0.0
+    for obs, exp in zip(observed, expected):
+        o, e = o + obs, e + exp
+        if e >= min_expected:
+            pooled_observed.append(o)
+            pooled_expected.append(e)
+            o = e = 0.0
+    if e > 0 and pooled_expected:
+        pooled_observed[-1] += o
+        pooled_expected[-1] += e
+    pooled_observed, pooled_expected = np.array(pooled_observed), np.array(pooled_expected)
+    statistic = float(((pooled_observed - pooled_expected) ** 2 / pooled_expected).sum())
+    return statistic, _chi_square_sf(statistic, len(pooled_expected) - 1)
+
+
+def chi_square_two_sample(a, b, min_expected=5):
+    """
+    Chi-square test that two samples of discrete values (e.g. lattice wealth levels) share a distribution.
+
+    Bins are the distinct values of both samples, pooled in order as in chi_square_counts.
+    Returns (statistic, p-value).
+    """
+    levels = np.unique(np.concatenate([a, b]))
+    shares = np.array([len(a), len(b)]) / (len(a) + len(b))
+    pooled_counts = []
+    pooled = np.zeros(2)
+    for column in np.stack([np.bincount(np.searchsorted(levels, x), minlength=len(levels)) for x in (a, b)]).T:
+        pooled = pooled + column
+        if pooled.sum() * shares.min() >= min_expected:
+            pooled_counts.append(pooled)
+            pooled = np.zeros(2)
+    if pooled.sum() > 0 and pooled_counts:
+        pooled_counts[-1] = pooled_counts[-1] + pooled
+    counts = np.array(pooled_counts)
+    expected = counts.sum(axis=1, keepdims=True) * shares
+    statistic = float(((counts - expected) ** 2 / expected).sum())
+    return statistic, _chi_square_sf(statistic, len(counts) - 1)
+
+
+def proportion_test(k1, n1, k2, n2):
+    # two-sided two-proportion z-test (the 2x2 chi-square), p-value
+    pooled = (k1 + k2) / (n1 + n2)
+    se = math.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+    if se == 0:
+        return 0.0, 1.0
+    z = (k1 / n1 - k2 / n2) / se
+    return z, math.erfc(abs(z) / math.sqrt(2))
+
+
+def mean_test(a, b):
+    # two-sided Welch z-test of equal means (large samples), p-value
+    se = math.sqrt(np.var(a, ddof=1) / len(a) + np.var(b, ddof=1) / len(b))
+    if se == 0:
+        return 0.0, 1.0 if np.mean(a) == np.mean(b) else 0.0
+    z = (np.mean(a) - np.mean(b)) / se
+    return z, math.erfc(abs(z) / math.sqrt(2))
+
+
+def _row(config, engine, check, statistic, p_value, alpha):
+    return {'config': config, 'engine': engine, 'check': check, 'statistic': float(statistic),
+            'p_value': float(p_value), 'passed': bool(p_value >= alpha)}
+
+
+def _compare(config, engine, reference, candidate, alpha, slopes=True):
+    # reference / candidate: dicts of per-path 'final_wealth', 'went_bankrupt' and (optionally) 'slope_log_wealth'
+    n1, n2 = len(reference['final_wealth']), len(candidate['final_wealth'])
+    rows = [
+        _row(config, engine, 'ruin rate', *proportion_test(reference['went_bankrupt'].sum(), n1,
+                                                           candidate['went_bankrupt'].sum(), n2), alpha),
+        _row(config, engine, 'final wealth (KS)', *ks_two_sample(reference['final_wealth'], candidate['final_wealth']), alpha),
+    ]
+    if slopes:
+        rows.append(_row(config, engine, 'mean Slope_Log_Wealth', *mean_test(reference['slope_log_wealth'],
+                                                                           candidate['slope_log_wealth']), alpha))
+    return rows
+
+
+def _kelly_reference(script, n, config, f_scaled, seed):
+    # the script's own loop, per-path columns from its DataFrame
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = script.run_multiple_simulations(n, config['starting_wealth'], config['p_up'], config['p_down'],
+                                             config['upper_bet_limit'], config['lower_threshold'], f_scaled, config['b'])[7]
+    return {
+        'final_wealth': df['Final_Wealth'].to_numpy(),
+        'went_bankrupt': df['Time_to_Ruin'].notna().to_numpy(),
+        'slope_log_wealth': df['Slope_Log_Wealth'].to_numpy(),
+    }
+
+
+def _kelly_checks(name, config, f_scaled, n, alpha, seed):
+    script = load_script(config['script'])
+    reference = _kelly_reference(script, n, config, f_scaled, seed)
+    args = (n, config['starting_wealth'], config['p_up'], config['p_down'], config['upper_bet_limit'],
+            config['lower_threshold'], config['b'])
+    engines = {
+        'numpy': lambda: simulate_paths(*args, f_scaled=f_scaled, seed=seed + 1),
+        'threads': lambda: simulate_paths_parallel(*args, f_scaled=f_scaled, seed=seed + 1, workers=4),
+    }
+    if HAVE_NUMBA:
+        engines['numba'] = lambda: simulate_paths_jit(*args, f_scaled=f_scaled, seed=seed + 1)
+    rows = []
+    for engine, run in engines.items():
+        rows += _compare(name, engine, reference, run(), alpha)
+    return rows
+
+
+def _fixed_checks(n, alpha, seed):
+    config = FIXED_V2
+    script = load_script(config['script'])
+    args = (config['starting_wealth'], config['up_amount'], config['p_up'], config['down_amount'], config['p_down'],
+            config['upper_bet_limit'], config['lower_threshold'])
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        loop = script.run_multiple_simulations(n, *args)
+    final = np.array(loop[0])
+    # the scripts don't return the ruin flags; a path is ruined iff it ended at or below the threshold
+    reference = {'final_wealth': final, 'went_bankrupt': final <= config['lower_threshold']}
+
+    lattice = simulate_fixed_paths(n, *args, seed=seed + 1)
+    rows = _compare('fixed V2', 'lattice', reference, lattice, alpha, slopes=False)
+    rows.append(_row('fixed V2', 'lattice', 'final wealth (chi-square)',
+                     *chi_square_two_sample(final, lattice['final_wealth']), alpha))
+
+    exact = exact_gamblers_ruin(*args)
+    k = int(reference['went_bankrupt'].sum())
+    p = exact['ruin_probability']
+    z = (k - n * p) / math.sqrt(n * p * (1 - p)) if 0 < p < 1 else 0.0
+    rows.append(_row('fixed V2', 'exact', 'ruin rate', z, math.erfc(abs(z) / math.sqrt(2)), alpha))
+    levels = exact['wealth_levels']
+    observed = np.bincount(np.searchsorted(levels, np.round(final, 9)), minlength=len(levels))[:len(levels)]
+    rows.append(_row('fixed V2', 'exact', 'final wealth (chi-square)',
+                     *chi_square_counts(observed, exact['final_wealth_probabilities']), alpha))
+    return rows
+
+
+def _stream_checks(n, seed):
+    # the batched legacy engine reads the same random stream: every path must match exactly
+    script = load_script('old/Monte Carlo - Kelly.py')
+    args = (1000, 110, 0.5, -100, 0.5, 1000, 250)
+    with contextlib.redirect_stdout(io.StringIO()):
+        random.seed(seed)
+        loop = script.run_multiple_simulations(n, *args, batched=False)
+        after_loop = random.random()
+        random.seed(seed)
+        batched = script.run_multiple_simulations(n, *args, batched=True)
+        after_batched = random.random()
+    same = (all(x == y for x, y in zip(loop[3], batched[3])) and len(loop[3]) == len(batched[3])
+            and loop[:3] == batched[:3] and after_loop == after_batched)
+    return [{'config': 'old Kelly', 'engine': 'stream', 'check': 'per-path equality', 'statistic': float(not same),
+             'p_value': 1.0 if same else 0.0, 'passed': same}]
+
+
+def _optimizer_checks(n, seed):
+    # the median optimum must be at least as good as the best point of a dense kelly_frontier
+    # grid on the same outcomes (same seed, so the same common random numbers)
+    rows = []
+    cases = {
+        'no misperception g=1': (NO_MISPERCEPTION['starting_wealth'], NO_MISPERCEPTION['p_up'], NO_MISPERCEPTION['p_down'],
+                                 NO_MISPERCEPTION['upper_bet_limit'], NO_MISPERCEPTION['lower_threshold'],
+                                 NO_MISPERCEPTION['b']),
+        'old Kelly': (1000, 0.5, 0.5, 1000, 250, 1.1),
+    }
+    for name, (w0, p_up, p_down, L, threshold, b) in cases.items():
+        f_star = float(compute_scaled_fraction(p_up, b, 1.0))
+        optimum = optimize_fraction(n, w0, p_up, p_down, L, threshold, b, f_star, objective='median', max_ruin=None,
+                                    seed=seed)
+        frontier = kelly_frontier(n, w0, p_up, p_down, L, threshold, b, f_star, scales=np.linspace(0, 2.5, 501),
+                                  seed=seed)
+        grid_best = float(frontier['median_log_growth'].max()) * L
+        shortfall = grid_best - math.log(optimum['median_final_wealth'] / w0)
+        passed = shortfall <= 1e-3
+        rows.append({'config': name, 'engine': 'optimize', 'check': 'median vs frontier grid', 'statistic': shortfall,
+                     'p_value': 1.0 if passed else 0.0, 'passed': passed})
+    return rows
+
+
+def _drawdown_checks(n, alpha, seed):
+    # exact_drawdown against the sampler: at f = 0 wealth never moves and at f = 1 the first loss
+    # ruins the path (the lattice can't represent either), and with b = 9 one win (m_u steps)
+    # climbs out of more than a short spell's depth
+    cases = {
+        'edge f=0': ((1000, 0.02, 0.01, 100, 250, 0.0, 1.1), (0.5,), (50,)),
+        'edge f=1': ((1000, 0.02, 0.01, 100, 250, 1.0, 1.1), (0.5,), (50,)),
+        'large b p=0.2 b=9': ((1000, 0.2, 0.8, 20, 1, 0.05, 9.0), (0.3,), (5, 8)),
+    }
+    rows = []
+    for name, (args, drawdowns, spells) in cases.items():
+        exact = exact_drawdown(*args, drawdowns=drawdowns, spells=spells)
+        sampled = sample_drawdown(n, *args, drawdowns=drawdowns, spells=spells, seed=seed)
+        checks = [(f"P(drawdown >= {dd:.0%})", exact['hit_probability'][i], sampled['hit_probability'][i])
+                  for i, dd in enumerate(drawdowns)]
+        checks += [(f"P({sp} bets under water)", exact['spell_probability'][i], sampled['spell_probability'][i])
+                   for i, sp in enumerate(spells)]
+        for check, p, share in checks:
+            if 0 < p < 1:
+                z = (share - p) / math.sqrt(p * (1 - p) / n)
+                rows.append(_row(name, 'exact', check, z, math.erfc(abs(z) / math.sqrt(2)), alpha))
+            else:
+                same = bool(share == p)
+                rows.append({'config': name, 'engine': 'exact', 'check': check, 'statistic': float(abs(share - p)),
+                             'p_value': 1.0 if same else 0.0, 'passed': same})
+    return rows
+
+
+def _memory_checks(seed):
+    # simulate_paths' traced peak must stay within max_bytes when the budget forces path
+    # chunks: with heavy ruin (compaction copies), and with a policy, outcome memory and histories
+    cases = {
+        'memory: ruin': (dict(f_scaled=0.3), 0.5, 1.1),
+        'memory: policy': (dict(policy=loss_streak_policy(0.01, 0.5), outcome_memory=8, keep_histories=5), 0.05, 20.0),
+    }
+    rows = []
+    for name, (strategy, p_up, b) in cases.items():
+        max_bytes = 20e6
+        tracemalloc.start()
+        try:
+            simulate_paths(20000, 1000, p_up, 1 - p_up, 400, 250, b, seed=seed, max_bytes=max_bytes, **strategy)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        passed = peak <= max_bytes
+        rows.append({'config': name, 'engine': 'numpy', 'check': 'peak bytes / max_bytes', 'statistic': peak / max_bytes,
+                     'p_value': 1.0 if passed else 0.0, 'passed': passed})
+    return rows
+
+
+def run_validation(num_simulations=2000, alpha=1e-3, seed=0):
+    """
+    Runs the reference loops and every fast engine on the shipped configurations and compares them.
+
+    Distribution checks (different random streams): ruin rate (two-proportion test),
+    final wealth (two-sample KS, plus chi-square on the fixed-bet lattice levels), mean
+    Slope_Log_Wealth (Welch z-test), and for fixed bets the loop against the exact
+    distribution. Where the streams align (the batched legacy engine) every path must
+    match exactly, and optimize_fraction's median optimum must match or beat the best
+    point of a dense kelly_frontier grid on the same outcomes. exact_drawdown at f_scaled 0
+    and 1, and with a win larger than a short spell's depth, is checked against sample_drawdown,
+    and simulate_paths' tracemalloc peak must stay within a max_bytes that forces chunking. A check passes when its p-value is at least alpha.
+
+    Returns:
+    - rows (list of dict): 'config', 'engine', 'check', 'statistic', 'p_value', 'passed'.
+    """
+    rows = _fixed_checks(num_simulations, alpha, seed)
+    for g in (0.5, 1.0, 2.0):
+        config = NO_MISPERCEPTION
+        f_scaled = float(compute_scaled_fraction(config['p_up'], config['b'], g))
+        rows += _kelly_checks(f"no misperception g={g}", config, f_scaled, num_simulations, alpha, seed)
+    config = MISPERCEPTION
+    f_scaled = float(compute_scaled_fraction(config['p_up'], config['b'], config['g']))
+    rows += _kelly_checks("misperception p=1/34 b=35", config, f_scaled, num_simulations, alpha, seed)
+    rows += _stream_checks(min(num_simulations, 500), seed)
+    rows += _optimizer_checks(min(num_simulations, 1000), seed)
+    rows += _drawdown_checks(num_simulations, alpha, seed)
+    rows += _memory_checks(seed)
+    return rows
+
+
+def print_validation(rows):
+
+    print(f"{'config':<28}{'engine':<9}{'check':<28}{'statistic':>11}{'p-value':>10}  result")
+    for row in rows:
+        print(f"{row['config']:<28}{row['engine']:<9}{row['check']:<28}{row['statistic']:>11.4f}{row['p_value']:>10.4f}  "
+              f"{'ok' if row['passed'] else 'FAIL'}")
+    failed = sum(not row['passed'] for row in rows)
+    print(f"\n{len(rows) - failed} of {len(rows)} checks passed.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='python -m kelly_engine.validation',
+                                     description="Compare every fast engine against the reference loops.")
+    parser.add_argument('-n', '--num-simulations', type=int, default=2000)
+    parser.add_argument('--alpha', type=float, default=1e-3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rows = run_validation(args.num_simulations, args.alpha, args.seed)
+    print_validation(rows)
+    raise SystemExit(any(not row['passed'] for row in rows))
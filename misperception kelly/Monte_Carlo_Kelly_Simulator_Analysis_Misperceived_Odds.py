@@ -1,8 +1,16 @@
 import random
-import matplotlib.pyplot as plt
 import math
-import pandas as pd
 import numpy as np
+import os
+import sys
+
+# make the shared engine at the repo root importable when running this script directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from kelly_engine import phase_timer, untimed, print_timings
+from kelly_engine import drawdown_throttled_policy, time_decay_policy
+from kelly_engine import run_multiple_simulations as run_policy_simulations
+from kelly_engine.analytic import growth_surface, growth_check, print_growth_preview, print_growth_check
+from kelly_engine.risk import risk_profile, print_risk_profile
 
 def run_single_simulation(starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b):
 
@@ -62,8 +70,9 @@ def run_single_simulation(starting_wealth, p_up_actual, p_down_actual, upper_bet
 
     return wealth_history, peak_wealth, min_wealth, went_bankrupt, bet_count
 
-def run_multiple_simulations(num_simulations, starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b):
+def run_multiple_simulations(num_simulations, starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b, phase=untimed):
 
+    import pandas as pd
     ruin_count = 0
     final_wealths = []
     peak_wealths = []
@@ -83,9 +92,10 @@ def run_multiple_simulations(num_simulations, starting_wealth, p_up_actual, p_do
     for sim in range(1, num_simulations + 1):
         # uncomment the following line to track simulation progress
         # print(f"\n=== Simulation {sim} ===")
-        wealth_history, peak_wealth, min_wealth, went_bankrupt, bet_count = run_single_simulation(
-            starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b
-        )
+        with phase("path simulation"):
+            wealth_history, peak_wealth, min_wealth, went_bankrupt, bet_count = run_single_simulation(
+                starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b
+            )
         all_wealth_histories.append(wealth_history)
         final_wealths.append(wealth_history[-1])
         peak_wealths.append(peak_wealth)
@@ -106,19 +116,20 @@ def run_multiple_simulations(num_simulations, starting_wealth, p_up_actual, p_do
             elif bet_count == max_bets_before_ruin:
                 simulations_with_max_bets_before_ruin.append(sim)
 
-        # log-transformed wealth history
-        log_wealth = np.log(wealth_history)
+        with phase("per-path stats"):
+            # log-transformed wealth history
+            log_wealth = np.log(wealth_history)
         
-        mean_log = np.mean(log_wealth)
-        std_log = np.std(log_wealth)
+            mean_log = np.mean(log_wealth)
+            std_log = np.std(log_wealth)
 
-        # find slope of line of best fit for log-wealth
-        # polyfit to fit: log_wealth = slope * bet_number + intercept
-        slope, intercept = np.polyfit(range(len(log_wealth)), log_wealth, 1)
+            # find slope of line of best fit for log-wealth
+            # polyfit to fit: log_wealth = slope * bet_number + intercept
+            slope, intercept = np.polyfit(range(len(log_wealth)), log_wealth, 1)
 
-        mean_log_wealth_list.append(mean_log)
-        std_log_wealth_list.append(std_log)
-        slope_log_wealth_list.append(slope)
+            mean_log_wealth_list.append(mean_log)
+            std_log_wealth_list.append(std_log)
+            slope_log_wealth_list.append(slope)
 
         # record time to ruin if applicable, else NaN
         if went_bankrupt:
@@ -145,7 +156,8 @@ def run_multiple_simulations(num_simulations, starting_wealth, p_up_actual, p_do
         'Final_Wealth': final_wealths
     }
 
-    simulation_df = pd.DataFrame(data)
+    with phase("DataFrame build"):
+        simulation_df = pd.DataFrame(data)
 
     # final summary
     print("\n=== All Simulations Summary ===")
@@ -190,6 +202,7 @@ def run_multiple_simulations(num_simulations, starting_wealth, p_up_actual, p_do
 
 def plot_sample_histories(all_wealth_histories, num_samples=10, g=1, scale=1, alph=1):
 
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6), dpi = 300)
     for i, history in enumerate(all_wealth_histories[:num_samples]):
         plt.plot(history, label=f"Simulation {i+1}")
@@ -202,6 +215,7 @@ def plot_sample_histories(all_wealth_histories, num_samples=10, g=1, scale=1, al
 
 def plot_sample_histories_log(all_wealth_histories, num_samples=10, num_sims = 10, g=1, scale=1, alph=1):
 
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6), dpi = 300)
     for i, history in enumerate(all_wealth_histories[:num_samples]):
         plt.plot(history, label=f"Simulation {i+1}")
@@ -214,6 +228,7 @@ def plot_sample_histories_log(all_wealth_histories, num_samples=10, num_sims = 1
 
 def plot_final_wealth_histogram(final_wealths, num_simulations, g=1, scale=1, alph=1):
 
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6), dpi = 300)
     plt.hist(final_wealths, bins=75, edgecolor='black', alpha=0.7)
     plt.xlabel("Final Wealth")
@@ -257,7 +272,7 @@ def simulate_gamblers_ruin_advanced():
     '''
     
     # Perceived Probability of Winning (Using Probability Weighting)
-    alpha = 1 # 0.9884032 is the point at which one bets on negative ev roulette
+    alpha = 1 # 0.9884032 is the point at which one bets on negative ev roulette (kelly_engine.break_even_alpha(1/38, 35))
   #  p_up_perceived = math.exp(- (math.log(2))**(1 - alpha) * (-math.log(p_up_actual))**alpha) # modified 50% one
     p_up_perceived = np.exp(-((-np.log(p_up_actual)) ** alpha))
     p_down_perceived = 1 - p_up_perceived
@@ -275,9 +290,17 @@ def simulate_gamblers_ruin_advanced():
     # STRATEGY PARAMETERS
     g = 0.93                          # relative risk aversion coefficient (1 for Kelly)
     scale = 1                       # scaling factor (1 for full Kelly, 0.5 for half-Kelly)
+    strategy = "constant"             # "constant", "drawdown" (throttle f as drawdown grows) or "time_decay" (scale f down to 0 over the bet limit)
+    max_drawdown = 0.5                # drawdown at which the "drawdown" strategy stops betting
+
+    # PROFILING
+    track_memory = False              # also record each phase's peak memory with tracemalloc (slows the per-bet loop)
+
+    phase, timings = phase_timer(track_memory)
 
     # calculate optimal fraction based on perceived probability
-    f_star = compute_optimal_fraction(p_up_perceived, b, g)
+    with phase("optimal fraction"):
+        f_star = compute_optimal_fraction(p_up_perceived, b, g)
     f_scaled = f_star * scale
 
     # ensure the fraction is between 0 and 1
@@ -318,7 +341,12 @@ def simulate_gamblers_ruin_advanced():
     print(f"Scaled Fraction (f_scaled): {f_scaled:.4f}\n")
     
     print(f"Upper bet limit: {upper_bet_limit}")
-    print(f"Ruin threshold: {lower_threshold}")
+    print(f"Ruin threshold: {lower_threshold}\n")
+
+    # closed-form preview of the constant-fraction run, before paying for Monte Carlo
+    surface = growth_surface(p_up_actual, b, g, scale, alpha, p_down=p_down_actual,
+                             num_bets=upper_bet_limit, starting_wealth=starting_wealth)
+    print_growth_preview(surface)
 
     # calculate EV and other statistics based on scaled fraction
     # since wager_amount is a fraction, EV per bet = f_scaled * (p_up_actual * b - p_down_actual)
@@ -333,21 +361,50 @@ def simulate_gamblers_ruin_advanced():
    # print(f"Expected Standard Deviation of Bet (Std): {bet_Std:.4f}\n")
 
     # run multiple simulations and capture the new DataFrame
-    final_wealths, peak_wealths, min_wealths, all_wealth_histories, ruin_count, smallest_min_wealth, highest_peak_wealth, simulation_df = run_multiple_simulations(
-        num_simulations, starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b
-    )
+    if strategy == "constant":
+        final_wealths, peak_wealths, min_wealths, all_wealth_histories, ruin_count, smallest_min_wealth, highest_peak_wealth, simulation_df = run_multiple_simulations(
+            num_simulations, starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b, phase=phase
+        )
+    else:
+        # state-dependent fraction, evaluated once per bet for every path by the vectorized engine
+        if strategy == "drawdown":
+            policy = drawdown_throttled_policy(f_scaled, max_drawdown)
+        else:
+            policy = time_decay_policy(f_scaled, upper_bet_limit)
+        final_wealths, peak_wealths, min_wealths, all_wealth_histories, ruin_count, smallest_min_wealth, highest_peak_wealth, simulation_df = run_policy_simulations(
+            num_simulations, starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b,
+            policy=policy, phase=phase
+        )
+
+    # flag a run whose average slope of log-wealth disagrees with theory
+    if strategy == "constant":
+        print_growth_check(growth_check(simulation_df['Slope_Log_Wealth'], surface['log_growth'],
+                                        log_wealth_change=np.log(simulation_df['Final_Wealth'] / starting_wealth),
+                                        bet_count=simulation_df['Time_to_Ruin'].fillna(upper_bet_limit)))
+
+    # certainty equivalents and tail risk of final wealth: exact for a constant fraction,
+    # importance-sampled around f_scaled for the state-dependent strategies
+    with phase("risk profile"):
+        profile = risk_profile(starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, b, f_scaled,
+                               policy=None if strategy == "constant" else policy, g=sorted({0.0, g, 1.0}),
+                               num_simulations=num_simulations)
+    print_risk_profile(profile)
 
     # plot sample wealth histories (original linear scale)
-    plot_sample_histories(all_wealth_histories, num_samples=num_simulations, g=g, scale=(scale*100), alph=alpha)
+    with phase("plot: sample histories"):
+        plot_sample_histories(all_wealth_histories, num_samples=num_simulations, g=g, scale=(scale*100), alph=alpha)
 
     # plot sample wealth histories with log scale
-    plot_sample_histories_log(all_wealth_histories, num_samples=100, num_sims=num_simulations, g=g, scale=(scale*100), alph=alpha)
+    with phase("plot: log histories"):
+        plot_sample_histories_log(all_wealth_histories, num_samples=100, num_sims=num_simulations, g=g, scale=(scale*100), alph=alpha)
 
     # plot histogram of final wealths
-    plot_final_wealth_histogram(final_wealths, num_simulations=num_simulations, g=g, scale=(scale*100), alph=alpha)
+    with phase("plot: final wealth histogram"):
+        plot_final_wealth_histogram(final_wealths, num_simulations=num_simulations, g=g, scale=(scale*100), alph=alpha)
 
     # optionally, you can save the DataFrame to a CSV file for further analysis
-    simulation_df.to_csv('simulation_results.csv', index=False)
+    with phase("CSV write"):
+        simulation_df.to_csv('simulation_results.csv', index=False)
 
   #  print("=== Simulation DataFrame Head ===")
   # print(simulation_df.head())  # display the first few rows of the DataFrame
@@ -359,5 +416,8 @@ def simulate_gamblers_ruin_advanced():
     # print(f"Expected Standard Deviation of Bet: {bet_Std:.4f}")
     # print(final_wealths)
 
+    print_timings(timings)
+    return timings
+
 if __name__ == "__main__":
     simulate_gamblers_ruin_advanced()
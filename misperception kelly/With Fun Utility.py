@@ -1,9 +1,14 @@
 import random
-import matplotlib.pyplot as plt
 import math
-import pandas as pd
 import numpy as np
-from scipy.optimize import minimize_scalar
+import os
+import sys
+
+# make the shared engine at the repo root importable when running this script directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from kelly_engine import phase_timer, untimed, print_timings
+from kelly_engine import solve_fun_utility_fraction, fun_utility_policy_table, interpolated_policy
+from kelly_engine import run_multiple_simulations as run_policy_simulations
 
 def run_single_simulation(starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b):
 
@@ -66,8 +71,9 @@ def run_single_simulation(starting_wealth, p_up_actual, p_down_actual, upper_bet
 
     return wealth_history, peak_wealth, min_wealth, went_bankrupt, bet_count
 
-def run_multiple_simulations(num_simulations, starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b):
+def run_multiple_simulations(num_simulations, starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b, phase=untimed):
 
+    import pandas as pd
     ruin_count = 0
     final_wealths = []
     peak_wealths = []
@@ -87,9 +93,10 @@ def run_multiple_simulations(num_simulations, starting_wealth, p_up_actual, p_do
     for sim in range(1, num_simulations + 1):
         # uncomment the following line to track simulation progress
         # print(f"\n=== Simulation {sim} ===")
-        wealth_history, peak_wealth, min_wealth, went_bankrupt, bet_count = run_single_simulation(
-            starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b
-        )
+        with phase("path simulation"):
+            wealth_history, peak_wealth, min_wealth, went_bankrupt, bet_count = run_single_simulation(
+                starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b
+            )
         all_wealth_histories.append(wealth_history)
         final_wealths.append(wealth_history[-1])
         peak_wealths.append(peak_wealth)
@@ -110,19 +117,20 @@ def run_multiple_simulations(num_simulations, starting_wealth, p_up_actual, p_do
             elif bet_count == max_bets_before_ruin:
                 simulations_with_max_bets_before_ruin.append(sim)
 
-        # log-transformed wealth history
-        log_wealth = np.log(wealth_history)
+        with phase("per-path stats"):
+            # log-transformed wealth history
+            log_wealth = np.log(wealth_history)
         
-        mean_log = np.mean(log_wealth)
-        std_log = np.std(log_wealth)
+            mean_log = np.mean(log_wealth)
+            std_log = np.std(log_wealth)
 
-        # find slope of line of best fit for log-wealth
-        # polyfit to fit: log_wealth = slope * bet_number + intercept
-        slope, intercept = np.polyfit(range(len(log_wealth)), log_wealth, 1)
+            # find slope of line of best fit for log-wealth
+            # polyfit to fit: log_wealth = slope * bet_number + intercept
+            slope, intercept = np.polyfit(range(len(log_wealth)), log_wealth, 1)
 
-        mean_log_wealth_list.append(mean_log)
-        std_log_wealth_list.append(std_log)
-        slope_log_wealth_list.append(slope)
+            mean_log_wealth_list.append(mean_log)
+            std_log_wealth_list.append(std_log)
+            slope_log_wealth_list.append(slope)
 
         # record time to ruin if applicable, else NaN
         if went_bankrupt:
@@ -149,7 +157,8 @@ def run_multiple_simulations(num_simulations, starting_wealth, p_up_actual, p_do
         'Final_Wealth': final_wealths
     }
 
-    simulation_df = pd.DataFrame(data)
+    with phase("DataFrame build"):
+        simulation_df = pd.DataFrame(data)
 
     # final summary
     print("\n=== All Simulations Summary ===")
@@ -173,6 +182,7 @@ def run_multiple_simulations(num_simulations, starting_wealth, p_up_actual, p_do
 
 def plot_sample_histories(all_wealth_histories, num_samples=10, g=1, scale=1):
 
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6))
     for i, history in enumerate(all_wealth_histories[:num_samples]):
         plt.plot(history, label=f"Simulation {i+1}")
@@ -185,6 +195,7 @@ def plot_sample_histories(all_wealth_histories, num_samples=10, g=1, scale=1):
 
 def plot_sample_histories_log(all_wealth_histories, num_samples=10, g=1, scale=1):
 
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6))
     for i, history in enumerate(all_wealth_histories[:num_samples]):
         plt.plot(history, label=f"Simulation {i+1}")
@@ -197,6 +208,7 @@ def plot_sample_histories_log(all_wealth_histories, num_samples=10, g=1, scale=1
 
 def plot_final_wealth_histogram(final_wealths, num_simulations, g=1, scale=1):
 
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6))
     plt.hist(final_wealths, bins=75, edgecolor='black', alpha=0.7)
     plt.xlabel("Final Wealth")
@@ -207,26 +219,10 @@ def plot_final_wealth_histogram(final_wealths, num_simulations, g=1, scale=1):
 
 def compute_optimal_fraction(p, b, g, c, alpha, W):
 
-    def expected_utility(f):
-        if g == 1:
-            U_m_win = math.log(W * (1 + f * b))
-            U_m_lose = math.log(W * (1 - f))
-        else:
-            U_m_win = (W * (1 + f * b))**(1 - g) / (1 - g)
-            U_m_lose = (W * (1 - f))**(1 - g) / (1 - g)
-        U_f = c * math.log(1 + alpha * f * b)
-        E_U = p * U_m_win + (1 - p) * U_m_lose + U_f
-        return E_U
-
-    def objective(f):
-        return -expected_utility(f)
-
-    result = minimize_scalar(objective, bounds=(0, 1), method='bounded')
-
-    if result.success:
-        return result.x
-    else:
-        return 0
+    # maximizes p*U(W(1+fb)) + (1-p)*U(W(1-f)) + c*log(1+alpha*f*b) over f in [0, 1]
+    # via the first-order condition (batched Newton), instead of a minimize_scalar closure.
+    # p, b, g, c, alpha and W can also be arrays to solve a whole sweep at once.
+    return solve_fun_utility_fraction(p, b, g, c, alpha, W)
 
 def simulate_gamblers_ruin_advanced():
 
@@ -268,8 +264,17 @@ def simulate_gamblers_ruin_advanced():
     c = 0
     alpha = 0
 
+    # re-solve f*(W) as wealth changes (True) or freeze it at starting_wealth (False)
+    wealth_dependent = True
+
+    # PROFILING
+    track_memory = False            # also record each phase's peak memory with tracemalloc (slows the per-bet loop)
+
+    phase, timings = phase_timer(track_memory)
+
     # calculate optimal fraction based on perceived probability
-    f_star = compute_optimal_fraction(p_up_perceived, b, g, c, alpha, starting_wealth)
+    with phase("optimal fraction"):
+        f_star = compute_optimal_fraction(p_up_perceived, b, g, c, alpha, starting_wealth)
     f_scaled = f_star * scale
 
     # ensure the fraction is between 0 and 1
@@ -325,21 +330,40 @@ def simulate_gamblers_ruin_advanced():
    # print(f"Expected Standard Deviation of Bet (Std): {bet_Std:.4f}\n")
 
     # run multiple simulations and capture the new DataFrame
-    final_wealths, peak_wealths, min_wealths, all_wealth_histories, ruin_count, smallest_min_wealth, highest_peak_wealth, simulation_df = run_multiple_simulations(
-        num_simulations, starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b
-    )
+    if wealth_dependent:
+        # tabulate f*(W) on a log-spaced wealth grid once; the engine interpolates it for every path at every bet
+        with phase("policy table"):
+            wealth_levels, policy_fractions = fun_utility_policy_table(
+                p_up_perceived, b, g, c, alpha, max(lower_threshold, starting_wealth * 1e-6), starting_wealth * 1e6, scale=scale
+            )
+        print(f"Wealth-Dependent Fraction Range (f(W)): {policy_fractions.min():.4f} to {policy_fractions.max():.4f}")
+        # with f_scaled <= 0 wealth never leaves starting_wealth, so no path places a bet (bet_count 0),
+        # as run_single_simulation returns before its first bet
+        bets = upper_bet_limit if f_scaled > 0 else 0
+        final_wealths, peak_wealths, min_wealths, all_wealth_histories, ruin_count, smallest_min_wealth, highest_peak_wealth, simulation_df = run_policy_simulations(
+            num_simulations, starting_wealth, p_up_actual, p_down_actual, bets, lower_threshold, f_scaled, b,
+            policy=interpolated_policy(wealth_levels, policy_fractions), phase=phase
+        )
+    else:
+        final_wealths, peak_wealths, min_wealths, all_wealth_histories, ruin_count, smallest_min_wealth, highest_peak_wealth, simulation_df = run_multiple_simulations(
+            num_simulations, starting_wealth, p_up_actual, p_down_actual, upper_bet_limit, lower_threshold, f_scaled, b, phase=phase
+        )
 
     # plot sample wealth histories (original linear scale)
-    plot_sample_histories(all_wealth_histories, num_samples=num_simulations, g=g, scale=(scale*100))
+    with phase("plot: sample histories"):
+        plot_sample_histories(all_wealth_histories, num_samples=num_simulations, g=g, scale=(scale*100))
 
     # plot sample wealth histories with log scale
-    plot_sample_histories_log(all_wealth_histories, num_samples=100, g=g, scale=(scale*100))
+    with phase("plot: log histories"):
+        plot_sample_histories_log(all_wealth_histories, num_samples=100, g=g, scale=(scale*100))
 
     # plot histogram of final wealths
-    plot_final_wealth_histogram(final_wealths, num_simulations=num_simulations, g=g, scale=(scale*100))
+    with phase("plot: final wealth histogram"):
+        plot_final_wealth_histogram(final_wealths, num_simulations=num_simulations, g=g, scale=(scale*100))
 
     # optionally, you can save the DataFrame to a CSV file for further analysis
-    simulation_df.to_csv('simulation_results.csv', index=False)
+    with phase("CSV write"):
+        simulation_df.to_csv('simulation_results.csv', index=False)
 
     print("=== Simulation DataFrame Head ===")
   # print(simulation_df.head())  # display the first few rows of the DataFrame
@@ -351,5 +375,8 @@ def simulate_gamblers_ruin_advanced():
     # print(f"Expected Standard Deviation of Bet: {bet_Std:.4f}")
     # print(final_wealths)
 
+    print_timings(timings)
+    return timings
+
 if __name__ == "__main__":
     simulate_gamblers_ruin_advanced()
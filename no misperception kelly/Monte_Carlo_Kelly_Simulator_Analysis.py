@@ -1,8 +1,13 @@
 import random
-import matplotlib.pyplot as plt
 import math
-import pandas as pd
 import numpy as np
+import os
+import sys
+
+# make the shared engine at the repo root importable when running this script directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from kelly_engine import phase_timer, untimed, print_timings
+from kelly_engine.analytic import growth_surface, growth_check, print_growth_preview, print_growth_check
 
 def run_single_simulation(starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b):
 
@@ -61,8 +66,9 @@ def run_single_simulation(starting_wealth, p_up, p_down, upper_bet_limit, lower_
 
     return wealth_history, peak_wealth, min_wealth, went_bankrupt, bet_count
 
-def run_multiple_simulations(num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b):
+def run_multiple_simulations(num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b, phase=untimed):
 
+    import pandas as pd
     ruin_count = 0
     final_wealths = []
     peak_wealths = []
@@ -82,9 +88,10 @@ def run_multiple_simulations(num_simulations, starting_wealth, p_up, p_down, upp
     for sim in range(1, num_simulations + 1):
         # uncomment the following line to track simulation progress...
         # print(f"\n=== Simulation {sim} ===")
-        wealth_history, peak_wealth, min_wealth, went_bankrupt, bet_count = run_single_simulation(
-            starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b
-        )
+        with phase("path simulation"):
+            wealth_history, peak_wealth, min_wealth, went_bankrupt, bet_count = run_single_simulation(
+                starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b
+            )
         all_wealth_histories.append(wealth_history)
         final_wealths.append(wealth_history[-1])
         peak_wealths.append(peak_wealth)
@@ -105,19 +112,20 @@ def run_multiple_simulations(num_simulations, starting_wealth, p_up, p_down, upp
             elif bet_count == max_bets_before_ruin:
                 simulations_with_max_bets_before_ruin.append(sim)
 
-        # log-transformed wealth history
-        log_wealth = np.log(wealth_history)
+        with phase("per-path stats"):
+            # log-transformed wealth history
+            log_wealth = np.log(wealth_history)
         
-        mean_log = np.mean(log_wealth)
-        std_log = np.std(log_wealth)
+            mean_log = np.mean(log_wealth)
+            std_log = np.std(log_wealth)
 
-        # find slope of line of best fit for log-wealth
-        # polyfit to fit: log_wealth = slope * bet_number + intercept
-        slope, intercept = np.polyfit(range(len(log_wealth)), log_wealth, 1)
+            # find slope of line of best fit for log-wealth
+            # polyfit to fit: log_wealth = slope * bet_number + intercept
+            slope, intercept = np.polyfit(range(len(log_wealth)), log_wealth, 1)
 
-        mean_log_wealth_list.append(mean_log)
-        std_log_wealth_list.append(std_log)
-        slope_log_wealth_list.append(slope)
+            mean_log_wealth_list.append(mean_log)
+            std_log_wealth_list.append(std_log)
+            slope_log_wealth_list.append(slope)
 
         # record time to ruin if applicable, else NaN
         if went_bankrupt:
@@ -144,7 +152,8 @@ def run_multiple_simulations(num_simulations, starting_wealth, p_up, p_down, upp
         'Final_Wealth': final_wealths
     }
 
-    simulation_df = pd.DataFrame(data)
+    with phase("DataFrame build"):
+        simulation_df = pd.DataFrame(data)
 
     # FINAL SUMMARY
     print("\n=== All Simulations Summary ===")
@@ -168,6 +177,7 @@ def run_multiple_simulations(num_simulations, starting_wealth, p_up, p_down, upp
 
 def plot_sample_histories(all_wealth_histories, num_samples=10, g=1, scale=1):
 
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6))
     for i, history in enumerate(all_wealth_histories[:num_samples]):
         plt.plot(history, label=f"Simulation {i+1}")
@@ -180,6 +190,7 @@ def plot_sample_histories(all_wealth_histories, num_samples=10, g=1, scale=1):
 
 def plot_sample_histories_log(all_wealth_histories, num_samples=10, g=1, scale=1):
 
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6))
     for i, history in enumerate(all_wealth_histories[:num_samples]):
         plt.plot(history, label=f"Simulation {i+1}")
@@ -193,6 +204,7 @@ def plot_sample_histories_log(all_wealth_histories, num_samples=10, g=1, scale=1
 
 def plot_final_wealth_histogram(final_wealths, num_simulations, g=1, scale=1):
 
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6))
     plt.hist(final_wealths, bins=75, edgecolor='black', alpha=0.7)
     plt.xlabel("Final Wealth")
@@ -236,8 +248,14 @@ def simulate_gamblers_ruin_advanced():
     g = 1                          # gamma > 0 (1 for Kelly)
     scale = 1                      # scaling factor (1 for full Kelly, 0.5 for half-Kelly)
 
+    # PROFILING
+    track_memory = False           # also record each phase's peak memory with tracemalloc (slows the per-bet loop)
+
+    phase, timings = phase_timer(track_memory)
+
     # calculate optimal fraction based on CRRA utility
-    f_star = compute_optimal_fraction(p_up, b, g)
+    with phase("optimal fraction"):
+        f_star = compute_optimal_fraction(p_up, b, g)
     f_scaled = f_star * scale
 
     # ensure the fraction is between 0 and 1
@@ -269,19 +287,31 @@ def simulate_gamblers_ruin_advanced():
     print(f"Expected Variance of Bet (Var): {bet_Var:.4f}")
     print(f"Expected Standard Deviation of Bet (Std): {bet_Std:.4f}\n")
 
+    # closed-form preview, before paying for Monte Carlo
+    surface = growth_surface(p_up, b, g, scale, p_down=p_down, num_bets=upper_bet_limit, starting_wealth=starting_wealth)
+    print_growth_preview(surface)
+
     # Run multiple simulations and capture the new DataFrame
     final_wealths, peak_wealths, min_wealths, all_wealth_histories, ruin_count, smallest_min_wealth, highest_peak_wealth, simulation_df = run_multiple_simulations(
-        num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b
+        num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b, phase=phase
     )
 
+    # flag a run whose average slope of log-wealth disagrees with theory
+    print_growth_check(growth_check(simulation_df['Slope_Log_Wealth'], surface['log_growth'],
+                                    log_wealth_change=np.log(simulation_df['Final_Wealth'] / starting_wealth),
+                                    bet_count=simulation_df['Time_to_Ruin'].fillna(upper_bet_limit)))
+
     # plot sample wealth histories (original linear scale)
-    plot_sample_histories(all_wealth_histories, num_samples=100, g=g, scale=(scale*100))
+    with phase("plot: sample histories"):
+        plot_sample_histories(all_wealth_histories, num_samples=100, g=g, scale=(scale*100))
 
     # plot sample wealth histories with log scale
-    plot_sample_histories_log(all_wealth_histories, num_samples=100, g=g, scale=(scale*100))
+    with phase("plot: log histories"):
+        plot_sample_histories_log(all_wealth_histories, num_samples=100, g=g, scale=(scale*100))
 
     # plot histogram of final wealths
-    plot_final_wealth_histogram(final_wealths, num_simulations=100, g=g, scale=(scale*100))
+    with phase("plot: final wealth histogram"):
+        plot_final_wealth_histogram(final_wealths, num_simulations=100, g=g, scale=(scale*100))
 
     # Optionally, you can save the DataFrame to a CSV file for further analysis
    # simulation_df.to_csv('simulation_results.csv', index=False)
@@ -295,5 +325,8 @@ def simulate_gamblers_ruin_advanced():
    # print(f"Expected Standard Deviation of Bet: {bet_Std:.4f}")
     #print(final_wealths)
 
+    print_timings(timings)
+    return timings
+
 if __name__ == "__main__":
     simulate_gamblers_ruin_advanced()
@@ -1,5 +1,4 @@
 import random
-import matplotlib.pyplot as plt
 import math
 
 def run_single_simulation(starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_scaled, b):
@@ -125,6 +124,7 @@ def run_multiple_simulations(num_simulations, starting_wealth, p_up, p_down, upp
 
 def plot_sample_histories(all_wealth_histories, num_samples=10, g=1, scale=1):
 
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6))
     for i, history in enumerate(all_wealth_histories[:num_samples]):
         plt.plot(history, label=f"Simulation {i+1}")
@@ -137,6 +137,7 @@ def plot_sample_histories(all_wealth_histories, num_samples=10, g=1, scale=1):
 
 def plot_final_wealth_histogram(final_wealths, num_simulations, g=1, scale=1):
 
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6))
     plt.hist(final_wealths, bins=75, edgecolor='black', alpha=0.7)
     plt.xlabel("Final Wealth")
@@ -1,6 +1,26 @@
 import random
-import matplotlib.pyplot as plt
 import math
+import os
+import sys
+
+# make the shared engine at the repo root importable when running this script directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from kelly_engine import simulate_stream_paths
+
+def kelly_fraction(return_win_percent, p_up, p_down):
+    """
+    Computes the (clamped) Kelly fraction for the bet.
+
+    Returns:
+    - b (float): Net odds.
+    - f_star (float): Kelly fraction, clamped to [0, 1].
+    """
+    b = return_win_percent / 100  # net odds
+    f_star = (b * p_up - p_down) / b  # KELLY CRITERION
+
+    # ensure f_star is within [0,1]
+    f_star = max(0, min(f_star, 1))
+    return b, f_star
 
 def run_single_simulation(starting_wealth, return_win_percent, p_up, return_loss_percent, p_down, upper_bet_limit, lower_threshold):
     """
@@ -29,16 +49,12 @@ def run_single_simulation(starting_wealth, return_win_percent, p_up, return_loss
     min_wealth = starting_wealth
     went_bankrupt = False
 
+    # the kelly fraction doesn't change from bet to bet, so compute it once
+    b, f_star = kelly_fraction(return_win_percent, p_up, p_down)
+
     while bet_count < upper_bet_limit and current_wealth > lower_threshold:
         bet_count += 1
 
-        # calculate kelly fraction
-        b = return_win_percent / 100  # net odds
-        f_star = (b * p_up - p_down) / b  # KELLY CRITERION
-
-        # ensure f_star is within [0,1]
-        f_star = max(0, min(f_star, 1))
-
         # determine wager amount
         wager_amount = f_star * current_wealth
 
@@ -84,13 +100,15 @@ def run_single_simulation(starting_wealth, return_win_percent, p_up, return_loss
     print(f"Total Bets Placed: {bet_count}")
     return wealth_history, peak_wealth, min_wealth, went_bankrupt, bet_count
 
-def run_multiple_simulations(num_simulations, starting_wealth, return_win_percent, p_up, return_loss_percent, p_down, upper_bet_limit, lower_threshold):
+def run_multiple_simulations(num_simulations, starting_wealth, return_win_percent, p_up, return_loss_percent, p_down, upper_bet_limit, lower_threshold, batched=True):
     """
     Runs multiple simulations of the Gambler's Ruin problem with dynamic wagering based on the Kelly Criterion.
 
     Parameters:
     - num_simulations (int): Number of simulations to run.
     - All other parameters as defined in run_single_simulation.
+    - batched (bool): Use the batched engine (same random stream, identical results) instead of
+      calling run_single_simulation once per simulation.
 
     Returns:
     - final_wealths (list): Final wealth from each simulation.
@@ -111,12 +129,34 @@ def run_multiple_simulations(num_simulations, starting_wealth, return_win_percen
     max_bets_before_ruin = 0
     simulations_with_max_bets_before_ruin = []
 
+    if batched:
+        # strategy evaluated once; outcomes read from random's stream in blocks
+        b, f_star = kelly_fraction(return_win_percent, p_up, p_down)
+        batch = simulate_stream_paths(
+            num_simulations, starting_wealth, p_up, p_down, upper_bet_limit, lower_threshold, f_star, b,
+            loss_fraction=return_loss_percent / 100
+        )
+
     for sim in range(1, num_simulations + 1):
         # uncomment below to see individual simulation headers...
         # print(f"\n=== Simulation {sim} ===")
-        wealth_history, peak_wealth, min_wealth, went_bankrupt, bet_count = run_single_simulation(
-            starting_wealth, return_win_percent, p_up, return_loss_percent, p_down, upper_bet_limit, lower_threshold
-        )
+        if batched:
+            # like the loop, keep starting_wealth itself until some bet moves past it
+            wealth_history = [starting_wealth] + batch['histories'][sim - 1][1:].tolist()
+            peak_wealth = max(wealth_history[1:], default=starting_wealth)
+            peak_wealth = peak_wealth if peak_wealth > starting_wealth else starting_wealth
+            min_wealth = min(wealth_history[1:], default=starting_wealth)
+            min_wealth = min_wealth if min_wealth < starting_wealth else starting_wealth
+            went_bankrupt = bool(batch['went_bankrupt'][sim - 1])
+            bet_count = int(batch['bet_count'][sim - 1])
+            if went_bankrupt:
+                print(f"\n--- Stopping Simulation ---")
+                print(f"Wealth has reached the lower threshold of {lower_threshold}.")
+            print(f"Total Bets Placed: {bet_count}")
+        else:
+            wealth_history, peak_wealth, min_wealth, went_bankrupt, bet_count = run_single_simulation(
+                starting_wealth, return_win_percent, p_up, return_loss_percent, p_down, upper_bet_limit, lower_threshold
+            )
         all_wealth_histories.append(wealth_history)
         final_wealths.append(wealth_history[-1])
         peak_wealths.append(peak_wealth)
@@ -171,6 +211,7 @@ def plot_sample_histories(all_wealth_histories, num_samples=10):
     - all_wealth_histories (list): List of wealth histories from all simulations.
     - num_samples (int): Number of simulations to plot.
     """
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6))
     for i, history in enumerate(all_wealth_histories[:num_samples]):
         plt.plot(history, label=f"Simulation {i+1}")
@@ -188,6 +229,7 @@ def plot_final_wealth_histogram(final_wealths):
     Parameters:
     - final_wealths (list): Final wealth from each simulation.
     """
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(12, 6))
     plt.hist(final_wealths, bins=50, edgecolor='black', alpha=0.7)
     plt.xlabel("Final Wealth")